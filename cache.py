@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache em memória com tempo de expiração (TTL) para consultas repetidas
+"""
+
+import inspect
+import time
+from functools import wraps
+
+def _congelar(valor):
+    """Converter dicts/listas em estruturas imutáveis para servir de chave"""
+    if isinstance(valor, dict):
+        return frozenset((chave, _congelar(v)) for chave, v in valor.items())
+    if isinstance(valor, (list, set)):
+        return tuple(_congelar(v) for v in valor)
+    return valor
+
+def ttl_cache(seconds):
+    """
+    Decorator que guarda o resultado de cada chamada por `seconds` segundos.
+    
+    A chave é formada pelos argumentos já normalizados (posicionais, nomeados
+    e valores padrão), então select_data(t, columns='x') e select_data(t, 'x')
+    caem na mesma entrada. Resultados None (erro) não são guardados.
+    
+    `funcao.cache_clear(*prefixo)` remove as entradas cujos primeiros
+    argumentos são `prefixo` (sem argumentos, limpa tudo).
+    """
+    def decorador(func):
+        assinatura = inspect.signature(func)
+        cache = {}
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            argumentos = assinatura.bind(*args, **kwargs)
+            argumentos.apply_defaults()
+            chave = tuple(_congelar(v) for v in argumentos.arguments.values())
+            
+            agora = time.monotonic()
+            entrada = cache.get(chave)
+            if entrada is not None and entrada[1] > agora:
+                return entrada[0]
+            
+            # Expiração preguiçosa: entradas vencidas só saem quando consultadas
+            resultado = func(*args, **kwargs)
+            if resultado is not None:
+                cache[chave] = (resultado, agora + seconds)
+            else:
+                cache.pop(chave, None)
+            return resultado
+        
+        def cache_clear(*prefixo):
+            if not prefixo:
+                cache.clear()
+                return
+            
+            prefixo = tuple(_congelar(v) for v in prefixo)
+            for chave in [c for c in cache if c[:len(prefixo)] == prefixo]:
+                del cache[chave]
+        
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    
+    return decorador
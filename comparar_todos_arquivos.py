@@ -6,8 +6,9 @@ e identificar quais são realmente novos (não aparecem em nenhum arquivo anteri
 """
 
 import csv
-import re
+import sys
 from datetime import datetime
+from operator import itemgetter
 
 def normalizar_nome(nome):
     """
@@ -16,8 +17,14 @@ def normalizar_nome(nome):
     if not nome:
         return ""
     
+    nome = nome.strip()
+    
+    # Caminho rápido: nome já em maiúsculas e sem acentos (caso comum nos CSVs)
+    if nome.isupper() and nome.isascii():
+        return sys.intern(' '.join(nome.split()))
+    
     # Remove espaços extras e converte para maiúsculas
-    nome_normalizado = re.sub(r'\s+', ' ', nome.strip()).upper()
+    nome_normalizado = ' '.join(nome.split()).upper()
     
     # Remove acentos e caracteres especiais para comparação mais flexível
     nome_sem_acentos = nome_normalizado
@@ -28,7 +35,10 @@ def normalizar_nome(nome):
     nome_sem_acentos = nome_sem_acentos.replace('Ú', 'U')
     nome_sem_acentos = nome_sem_acentos.replace('Ç', 'C')
     
-    return nome_sem_acentos
+    # Internar o nome: os mesmos responsáveis se repetem em vários arquivos,
+    # então cada nome fica uma única vez em memória e as comparações entre
+    # conjuntos ficam mais rápidas
+    return sys.intern(nome_sem_acentos)
 
 def carregar_responsaveis_arquivo(arquivo):
     """
@@ -82,7 +92,7 @@ def carregar_todos_arquivos_anteriores():
 
 def obter_responsaveis_novos_03agosto():
     """
-    Obtém os 41 responsáveis que estão no arquivo de 03/08 mas não no de 27/07
+    Gera os 41 responsáveis que estão no arquivo de 03/08 mas não no de 27/07
     """
     arquivo_27julho = "responsaveis_com_dividas_20250727_144957.csv"
     arquivo_03agosto = "responsaveis_com_dividas_20250803_130614.csv"
@@ -93,9 +103,7 @@ def obter_responsaveis_novos_03agosto():
     # Responsáveis novos (03/08 - 27/07)
     responsaveis_novos = responsaveis_03agosto - responsaveis_27julho
     
-    # Obter dados completos dos responsáveis novos
-    dados_completos = []
-    
+    # Gerar dados completos dos responsáveis novos, linha a linha
     try:
         with open(arquivo_03agosto, 'r', encoding='utf-8') as file:
             reader = csv.DictReader(file)
@@ -104,19 +112,16 @@ def obter_responsaveis_novos_03agosto():
                 if nome:
                     nome_normalizado = normalizar_nome(nome)
                     if nome_normalizado in responsaveis_novos:
-                        dados_completos.append({
+                        yield {
                             'nome': nome,
                             'telefone': row.get('Telefone', ''),
                             'cpf_cnpj': row.get('CPF/CNPJ', ''),
                             'email': row.get('e-mail', ''),
                             'nome_normalizado': nome_normalizado
-                        })
-        
-        return dados_completos
+                        }
         
     except Exception as e:
         print(f"❌ Erro ao obter dados completos: {e}")
-        return []
 
 def main():
     """
@@ -125,28 +130,38 @@ def main():
     print("🔍 COMPARADOR COMPLETO - RESPONSÁVEIS NOVOS vs TODOS OS ARQUIVOS")
     print("=" * 80)
     
-    # Carregar responsáveis novos de 03/08
-    print("\n📋 Carregando responsáveis novos de 03/08...")
-    responsaveis_novos_03agosto = obter_responsaveis_novos_03agosto()
-    
-    if not responsaveis_novos_03agosto:
-        print("❌ Não foi possível carregar os responsáveis novos de 03/08")
-        return
-    
-    print(f"✅ Encontrados {len(responsaveis_novos_03agosto)} responsáveis novos em 03/08")
-    
     # Carregar todos os arquivos anteriores
     print("\n📋 Carregando todos os arquivos anteriores...")
     todos_responsaveis_anteriores = carregar_todos_arquivos_anteriores()
     
     print(f"✅ Total de responsáveis em todos os arquivos anteriores: {len(todos_responsaveis_anteriores)}")
     
+    # Carregar responsáveis novos de 03/08, já separando numa única passada
+    # os realmente novos dos que aparecem em arquivos anteriores
+    print("\n📋 Carregando responsáveis novos de 03/08...")
+    dados_realmente_novos = []
+    dados_que_aparecem = []
+    
+    for responsavel in obter_responsaveis_novos_03agosto():
+        if responsavel['nome_normalizado'] in todos_responsaveis_anteriores:
+            dados_que_aparecem.append(responsavel)
+        else:
+            dados_realmente_novos.append(responsavel)
+    
+    total_novos_03agosto = len(dados_realmente_novos) + len(dados_que_aparecem)
+    
+    if not total_novos_03agosto:
+        print("❌ Não foi possível carregar os responsáveis novos de 03/08")
+        return
+    
+    print(f"✅ Encontrados {total_novos_03agosto} responsáveis novos em 03/08")
+    
     # Encontrar responsáveis realmente novos
-    nomes_novos_normalizados = {r['nome_normalizado'] for r in responsaveis_novos_03agosto}
-    responsaveis_realmente_novos = nomes_novos_normalizados - todos_responsaveis_anteriores
+    responsaveis_realmente_novos = {r['nome_normalizado'] for r in dados_realmente_novos}
+    responsaveis_que_aparecem_anteriores = {r['nome_normalizado'] for r in dados_que_aparecem}
     
     print(f"\n📊 ESTATÍSTICAS:")
-    print(f"   • Responsáveis novos em 03/08: {len(responsaveis_novos_03agosto)}")
+    print(f"   • Responsáveis novos em 03/08: {total_novos_03agosto}")
     print(f"   • Total em arquivos anteriores: {len(todos_responsaveis_anteriores)}")
     print(f"   • Responsáveis REALMENTE novos: {len(responsaveis_realmente_novos)}")
     
@@ -154,14 +169,8 @@ def main():
         print(f"\n🆕 RESPONSÁVEIS REALMENTE NOVOS (não aparecem em nenhum arquivo anterior):")
         print("=" * 80)
         
-        # Filtrar dados completos dos responsáveis realmente novos
-        dados_realmente_novos = [
-            r for r in responsaveis_novos_03agosto 
-            if r['nome_normalizado'] in responsaveis_realmente_novos
-        ]
-        
         # Ordenar por nome
-        dados_realmente_novos.sort(key=lambda x: x['nome'])
+        dados_realmente_novos.sort(key=itemgetter('nome'))
         
         for i, responsavel in enumerate(dados_realmente_novos, 1):
             print(f"{i:2d}. {responsavel['nome']}")
@@ -195,18 +204,11 @@ def main():
         print("   Todos os responsáveis novos de 03/08 já apareciam em algum arquivo anterior.")
     
     # Mostrar responsáveis que aparecem em arquivos anteriores
-    responsaveis_que_aparecem_anteriores = nomes_novos_normalizados & todos_responsaveis_anteriores
-    
     if responsaveis_que_aparecem_anteriores:
         print(f"\n📋 RESPONSÁVEIS QUE APARECEM EM ARQUIVOS ANTERIORES ({len(responsaveis_que_aparecem_anteriores)}):")
         print("=" * 80)
         
-        dados_que_aparecem = [
-            r for r in responsaveis_novos_03agosto 
-            if r['nome_normalizado'] in responsaveis_que_aparecem_anteriores
-        ]
-        
-        dados_que_aparecem.sort(key=lambda x: x['nome'])
+        dados_que_aparecem.sort(key=itemgetter('nome'))
         
         for i, responsavel in enumerate(dados_que_aparecem, 1):
             print(f"{i:2d}. {responsavel['nome']}")
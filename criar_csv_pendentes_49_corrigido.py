@@ -14,67 +14,69 @@ def normalizar_nome(nome: str) -> str:
     """
     return ' '.join(nome.split()).upper()
 
+# Lista dos 49 responsáveis que estão faltando no relatório
+_PENDENTES_RAW = (
+    "ADRIANA SANTOS LEÔNCIO BRANDÃO",
+    "ADRIANO ELISMAEL MACÊDO DE PAIVA",
+    "ALEXANDRA LIMA BEZERRA",
+    "ALINE MANETTI LOPES BARANSKI",
+    "ANA CLEIDE DE AGUIAR FERREIRA",
+    "ANA LUIZA DOS SANTOS CRUZ",
+    "ASENATE DAMARIS CAETANO DA ROCHA",
+    "AURICEA MARIA DE MEDEIROS",
+    "BERENICE DE CARVALHO SOUSA",
+    "CARLA PAVONE SANTISTEBAN",
+    "CARLA SONEIDE DA SILVA OLIVEIRA BATISTA",
+    "CASSIA CASTILHO MAROTTI",
+    "CHRISTIELLE DE LIMA CONRADO",
+    "CLEBER PEDRO DE OLIVEIRA",
+    "DIUANA NUNES DA SILVA",
+    "ELIANDERSON OLIVEIRA DOS SANTOS",
+    "ELIZANDRO HEBERT RENOVATO DE MIRANDA",
+    "EMILIANE FRANCISCA DA SILVA LUCENA",
+    "FLAVIA DE OLIVEIRA GOMES DE ARAÚJO",
+    "GIULLIANE ROCHA BOTARELI DANTAS",
+    "HAGAR MARIA DE ANDRADE PINHEIRO",
+    "IRANIR RIBEIRO DA SILVA BATISTA",
+    "JAMILE MARQUES BARROS DA SILVA",
+    "JANAINA ATALIBA DE MELO SOUZA",
+    "JANAÍNA CORDULA DO LAGO",
+    "JAZIA AMARILES DA SILVA OLIVEIRA",
+    "JEFFERSON WLLISSES NASCIMENTO DE SOUZA",
+    "JESSICA KAROLINE CAMPOS COSTA",
+    "KENNYA AMORIM DE LIMA GRALHA",
+    "LAURIANO DA SILVA COUTO",
+    "LUCAS RAMATIS",
+    "LUCIANA MONTEIRO MARQUES",
+    "MARCIA TALITA",
+    "MARCOS AURELIO PEREIRA DE AZEVEDO",
+    "MARCOS DELGADO DA SILVA",
+    "MARCOS SANT'ANNA DA SILVA JUNIOR",
+    "MARIA DE FATIMA DA SILVA FARIAS SOARES",
+    "MARIA DE FATIMA DA SILVA LIMA",
+    "MARIA JOSENY",
+    "MARIA MARILENE DE OLIVEIRA",
+    "MARIANA SILVA",
+    "MARIANGELA MOTA DE OLIVEIRA NUNES",
+    "MARILIA DE MOURA CAFÉ FREIRE",
+    "O'HARA DANIELE SOARES COUTINHO",
+    "PAULA LILIANE MEDEIROS DA CONCEIÇÃO",
+    "ROSINARA DA SILVA BORGES SANTANA",
+    "RUTE MEDEIROS DE ALBUQUERQUE",
+    "SUELY ALESSANDRA DA SILVA ALVES",
+    "VERANA SIMÃO DE HOLANDA MOURA"
+)
+
+# Nomes normalizados calculados uma única vez, na importação do módulo:
+# a tupla preserva a ordem de escrita e o frozenset serve para as buscas
+_PENDENTES_ORDENADOS = tuple(normalizar_nome(nome) for nome in _PENDENTES_RAW)
+PENDENTES_NORMALIZADOS = frozenset(_PENDENTES_ORDENADOS)
+
 def criar_csv_pendentes():
     """
     Cria CSV apenas com os 49 responsáveis pendentes
     """
     
-    # Lista dos 49 responsáveis que estão faltando no relatório
-    responsaveis_pendentes = [
-        "ADRIANA SANTOS LEÔNCIO BRANDÃO",
-        "ADRIANO ELISMAEL MACÊDO DE PAIVA",
-        "ALEXANDRA LIMA BEZERRA",
-        "ALINE MANETTI LOPES BARANSKI",
-        "ANA CLEIDE DE AGUIAR FERREIRA",
-        "ANA LUIZA DOS SANTOS CRUZ",
-        "ASENATE DAMARIS CAETANO DA ROCHA",
-        "AURICEA MARIA DE MEDEIROS",
-        "BERENICE DE CARVALHO SOUSA",
-        "CARLA PAVONE SANTISTEBAN",
-        "CARLA SONEIDE DA SILVA OLIVEIRA BATISTA",
-        "CASSIA CASTILHO MAROTTI",
-        "CHRISTIELLE DE LIMA CONRADO",
-        "CLEBER PEDRO DE OLIVEIRA",
-        "DIUANA NUNES DA SILVA",
-        "ELIANDERSON OLIVEIRA DOS SANTOS",
-        "ELIZANDRO HEBERT RENOVATO DE MIRANDA",
-        "EMILIANE FRANCISCA DA SILVA LUCENA",
-        "FLAVIA DE OLIVEIRA GOMES DE ARAÚJO",
-        "GIULLIANE ROCHA BOTARELI DANTAS",
-        "HAGAR MARIA DE ANDRADE PINHEIRO",
-        "IRANIR RIBEIRO DA SILVA BATISTA",
-        "JAMILE MARQUES BARROS DA SILVA",
-        "JANAINA ATALIBA DE MELO SOUZA",
-        "JANAÍNA CORDULA DO LAGO",
-        "JAZIA AMARILES DA SILVA OLIVEIRA",
-        "JEFFERSON WLLISSES NASCIMENTO DE SOUZA",
-        "JESSICA KAROLINE CAMPOS COSTA",
-        "KENNYA AMORIM DE LIMA GRALHA",
-        "LAURIANO DA SILVA COUTO",
-        "LUCAS RAMATIS",
-        "LUCIANA MONTEIRO MARQUES",
-        "MARCIA TALITA",
-        "MARCOS AURELIO PEREIRA DE AZEVEDO",
-        "MARCOS DELGADO DA SILVA",
-        "MARCOS SANT'ANNA DA SILVA JUNIOR",
-        "MARIA DE FATIMA DA SILVA FARIAS SOARES",
-        "MARIA DE FATIMA DA SILVA LIMA",
-        "MARIA JOSENY",
-        "MARIA MARILENE DE OLIVEIRA",
-        "MARIANA SILVA",
-        "MARIANGELA MOTA DE OLIVEIRA NUNES",
-        "MARILIA DE MOURA CAFÉ FREIRE",
-        "O'HARA DANIELE SOARES COUTINHO",
-        "PAULA LILIANE MEDEIROS DA CONCEIÇÃO",
-        "ROSINARA DA SILVA BORGES SANTANA",
-        "RUTE MEDEIROS DE ALBUQUERQUE",
-        "SUELY ALESSANDRA DA SILVA ALVES",
-        "VERANA SIMÃO DE HOLANDA MOURA"
-    ]
-    
-    # Normalizar nomes da lista
-    responsaveis_pendentes_normalizados = [normalizar_nome(nome) for nome in responsaveis_pendentes]
-    
     # Ler dados completos do CSV original
     dados_completos = {}
     nomes_encontrados = 0
@@ -87,7 +89,7 @@ def criar_csv_pendentes():
                 nome_normalizado = normalizar_nome(nome_original)
                 
                 # Verificar se este nome está na lista de pendentes
-                if nome_normalizado in responsaveis_pendentes_normalizados:
+                if nome_normalizado in PENDENTES_NORMALIZADOS:
                     dados_completos[nome_normalizado] = linha
                     nomes_encontrados += 1
                     
@@ -110,7 +112,7 @@ def criar_csv_pendentes():
             writer.writerow(['Nome', 'Telefone', 'CPF/CNPJ', 'e-mail'])
             
             # Dados dos responsáveis pendentes
-            for nome_normalizado in responsaveis_pendentes_normalizados:
+            for nome_normalizado in _PENDENTES_ORDENADOS:
                 if nome_normalizado in dados_completos:
                     linha = dados_completos[nome_normalizado]
                     writer.writerow([
@@ -123,7 +125,7 @@ def criar_csv_pendentes():
                     print(f"⚠️ Nome não encontrado no CSV original: {nome_normalizado}")
         
         print(f"✅ CSV criado com sucesso: {arquivo_saida}")
-        print(f"📊 Total de responsáveis: {len(responsaveis_pendentes)}")
+        print(f"📊 Total de responsáveis: {len(_PENDENTES_RAW)}")
         
         # Verificar se todos foram incluídos
         with open(arquivo_saida, 'r', encoding='utf-8') as arquivo:
@@ -131,10 +133,10 @@ def criar_csv_pendentes():
             total_linhas = len(linhas) - 1  # -1 para excluir cabeçalho
             print(f"📝 Linhas no arquivo (excluindo cabeçalho): {total_linhas}")
             
-            if total_linhas == len(responsaveis_pendentes):
+            if total_linhas == len(_PENDENTES_RAW):
                 print("✅ Todos os responsáveis foram incluídos corretamente")
             else:
-                print(f"⚠️ Diferença encontrada: {len(responsaveis_pendentes)} esperados vs {total_linhas} incluídos")
+                print(f"⚠️ Diferença encontrada: {len(_PENDENTES_RAW)} esperados vs {total_linhas} incluídos")
                 
     except Exception as e:
         print(f"❌ Erro ao criar CSV: {str(e)}")
@@ -161,16 +161,13 @@ def analisar_compras_com_produtos():
                             if produtos_resp.status_code == 200:
                                 produtos_compra = produtos_resp.json()
                                 if produtos_compra:
-                                    produtos_nomes = []
-                                    for pc in produtos_compra:
-                                        if pc['produto_id'] in produtos_dict:
-                                            nome = produtos_dict[pc['produto_id']]['nome']
-                                            if pc['quantidade'] > 1:
-                                                produtos_nomes.append(f"{pc['quantidade']}x {nome}")
-                                            else:
-                                                produtos_nomes.append(nome)
-                                    
-                                    descricao = " + ".join(produtos_nomes)
+                                    descricao = " + ".join(
+                                        f"{pc['quantidade']}x {produtos_dict[pc['produto_id']]['nome']}"
+                                        if pc['quantidade'] > 1
+                                        else produtos_dict[pc['produto_id']]['nome']
+                                        for pc in produtos_compra
+                                        if pc['produto_id'] in produtos_dict
+                                    )
                                     print(f"      • R$ {valor} - {descricao}")
                                 else:
                                     print(f"      • R$ {valor} - Produto não especificado")
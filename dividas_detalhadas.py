@@ -4,10 +4,12 @@ Script para gerar CSV detalhado com responsáveis, alunos e consumo individual
 Inclui detalhes de cada compra/consumo realizado pelos alunos
 """
 
+import io
 import os
 import csv
-import re
-import requests
+import orjson
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -16,44 +18,112 @@ load_dotenv()
 
 # Importar nossa classe
 from responsaveis_requests import SupabaseRequests
+from formatters import formatar_contato, formatar_data, formatar_valor
 
-def formatar_contato(contato):
-    """Formatar contato para o padrão (84) 99695-2876"""
-    if not contato:
-        return "N/A"
+# Quantidade máxima de IDs por requisição id=in.(...), para não estourar o
+# limite de tamanho de URL do gateway
+TAMANHO_LOTE_IDS = 200
+
+# Linhas por página nas consultas paginadas (limite padrão do PostgREST)
+TAMANHO_PAGINA = 1000
+
+# Requisições simultâneas: abaixo do pool_maxsize (20) do adapter da sessão,
+# para que nenhuma conexão seja descartada e reaberta
+MAX_REQUISICOES_PARALELAS = 8
+
+def buscar_paginado(supabase, tabela, filtro=''):
+    """Buscar todas as linhas de uma consulta, página a página via header Range
     
-    # Remover tudo que não é número
-    apenas_numeros = re.sub(r'[^0-9]', '', contato)
+    Sem paginação o PostgREST corta a resposta no limite de linhas configurado.
+    Retorna a lista de linhas ou None em caso de erro.
+    """
+    return _buscar_consultas(supabase, tabela, [filtro])
+
+def _buscar_consultas(supabase, tabela, filtros):
+    """Buscar todas as linhas de várias consultas (uma por filtro) paginadas
     
-    # Se tem 11 dígitos (padrão brasileiro com DDD)
-    if len(apenas_numeros) == 11:
-        ddd = apenas_numeros[:2]
-        parte1 = apenas_numeros[2:7]
-        parte2 = apenas_numeros[7:11]
-        return f"({ddd}) {parte1}-{parte2}"
+    Um único pool de threads atende tudo: primeiro a página 0 de cada consulta,
+    que traz o total (Prefer: count=exact) no mesmo pedido, e depois as páginas
+    restantes de todas as consultas juntas. Retorna a lista de linhas ou None
+    em caso de erro.
+    """
+    # Ordem única (id) para que OFFSET/LIMIT de requisições separadas não
+    # repitam nem pulem linhas
+    urls = [f"{supabase.base_url}/{tabela}?{filtro}&order=id.asc" for filtro in filtros]
+    
+    def buscar_pagina(url, inicio, contar=False):
+        headers = {
+            'Range-Unit': 'items',
+            'Range': f"{inicio}-{inicio + TAMANHO_PAGINA - 1}"
+        }
+        if contar:
+            headers['Prefer'] = 'count=exact'
+        return supabase.session.get(url, headers=headers)
+    
+    with ThreadPoolExecutor(max_workers=MAX_REQUISICOES_PARALELAS) as executor:
+        respostas = list(executor.map(lambda url: buscar_pagina(url, 0, contar=True), urls))
+        
+        linhas_por_consulta = []
+        totais = []
+        paginas_restantes = []
+        for url, response in zip(urls, respostas):
+            if response.status_code not in (200, 206):
+                print(f"⚠️ Erro ao buscar {tabela}: {response.status_code}")
+                return None
+            
+            linhas = orjson.loads(response.content)
+            
+            # Content-Range: "0-999/1234" (ou "*/0" quando não há linhas)
+            total = response.headers.get('Content-Range', '').rpartition('/')[2]
+            total = int(total) if total.isdigit() else len(linhas)
+            
+            if len(linhas) < total:
+                if not linhas:
+                    print(f"⚠️ Erro ao buscar {tabela}: primeira página vazia com total {total}")
+                    return None
+                
+                # O servidor pode limitar as páginas abaixo de TAMANHO_PAGINA
+                # (max-rows); o passo é o tamanho que ele realmente devolveu
+                passo = len(linhas)
+                paginas_restantes.extend(
+                    (len(linhas_por_consulta), url, inicio) for inicio in range(passo, total, passo)
+                )
+            
+            linhas_por_consulta.append(linhas)
+            totais.append(total)
+        
+        respostas = executor.map(lambda pagina: buscar_pagina(pagina[1], pagina[2]), paginas_restantes)
+        for (indice, _, _), response in zip(paginas_restantes, respostas):
+            if response.status_code not in (200, 206):
+                print(f"⚠️ Erro ao buscar {tabela}: {response.status_code}")
+                return None
+            linhas_por_consulta[indice].extend(orjson.loads(response.content))
     
-    # Se tem 10 dígitos (sem o 9)
-    elif len(apenas_numeros) == 10:
-        ddd = apenas_numeros[:2]
-        parte1 = apenas_numeros[2:6]
-        parte2 = apenas_numeros[6:10]
-        return f"({ddd}) {parte1}-{parte2}"
+    resultado = []
+    for linhas, total in zip(linhas_por_consulta, totais):
+        if len(linhas) != total:
+            print(f"⚠️ Erro ao buscar {tabela}: {len(linhas)} linhas recebidas de {total}")
+            return None
+        resultado.extend(linhas)
     
-    # Se não conseguir formatar, retornar original
-    else:
-        return contato
+    return resultado
 
-def formatar_data(data_str):
-    """Formatar data para formato brasileiro dd/mm/yyyy"""
-    if not data_str:
-        return "N/A"
+def buscar_por_ids(supabase, tabela, coluna, ids):
+    """Buscar linhas de uma tabela filtrando `coluna` pelos IDs informados
     
-    try:
-        # Converter string ISO para datetime e depois para formato brasileiro
-        data_obj = datetime.fromisoformat(data_str.replace('Z', '+00:00'))
-        return data_obj.strftime("%d/%m/%Y")
-    except:
-        return data_str
+    Os IDs são enviados em lotes com o filtro in.(...) do PostgREST; os lotes
+    e suas páginas são buscados em paralelo. Retorna a lista de linhas ou None
+    em caso de erro.
+    """
+    ids = list(ids)
+    if not ids:
+        return []
+    
+    filtros = [
+        f"{coluna}=in.({','.join(str(id_) for id_ in ids[i:i + TAMANHO_LOTE_IDS])})"
+        for i in range(0, len(ids), TAMANHO_LOTE_IDS)
+    ]
+    return _buscar_consultas(supabase, tabela, filtros)
 
 def buscar_detalhes_consumo():
     """Buscar detalhes completos do consumo por responsável e aluno, incluindo produtos"""
@@ -67,124 +137,76 @@ def buscar_detalhes_consumo():
         
         if not responsaveis_com_dividas:
             print("⚠️ Nenhum responsável com dívidas encontrado")
-            return {}
+            return [], {}
+        
+        # Buscar apenas os produtos_comprados das compras pendentes (OTIMIZADO)
+        compra_ids = {
+            compra['id']
+            for responsavel in responsaveis_com_dividas
+            for aluno in responsavel.get('alunos', [])
+            for compra in aluno.get('compras_pendentes', [])
+        }
+        
+        print("🔗 Buscando relações produtos-comprados...")
+        produtos_comprados = buscar_por_ids(supabase, 'produtos_comprados', 'compra_id', compra_ids)
         
-        # Buscar todos os produtos para fazer o join
+        if produtos_comprados is not None:
+            print(f"✅ {len(produtos_comprados)} relações produtos-comprados carregadas")
+        else:
+            produtos_comprados = []
+        
+        # Buscar apenas os produtos que aparecem nessas relações para fazer o join
         print("🛒 Buscando informações dos produtos...")
-        produtos_response = requests.get(
-            f"{supabase.base_url}/produtos",
-            headers=supabase.headers
-        )
+        produto_ids = {pc['produto_id'] for pc in produtos_comprados}
+        produtos = buscar_por_ids(supabase, 'produtos', 'id', produto_ids)
         
-        if produtos_response.status_code == 200:
-            produtos = produtos_response.json()
+        if produtos is not None:
             produtos_dict = {p['id']: p for p in produtos}
             print(f"✅ {len(produtos)} produtos carregados")
         else:
-            print(f"⚠️ Erro ao buscar produtos: {produtos_response.status_code}")
             produtos_dict = {}
         
-        # Buscar tabela produtos_comprados para fazer join (OTIMIZADO)
-        print("🔗 Buscando relações produtos-comprados...")
-        produtos_comprados_response = requests.get(
-            f"{supabase.base_url}/produtos_comprados",
-            headers=supabase.headers
-        )
-        
-        if produtos_comprados_response.status_code == 200:
-            produtos_comprados = produtos_comprados_response.json()
-            # Mapear por compra_id para facilitar busca (OTIMIZADO)
-            produtos_por_compra = {}
-            for pc in produtos_comprados:
-                compra_id = pc['compra_id']
-                if compra_id not in produtos_por_compra:
-                    produtos_por_compra[compra_id] = []
-                produtos_por_compra[compra_id].append(pc)
-            print(f"✅ {len(produtos_comprados)} relações produtos-comprados carregadas")
-        else:
-            print(f"⚠️ Erro ao buscar produtos_comprados: {produtos_comprados_response.status_code}")
-            produtos_por_compra = {}
-        
-        # Reorganizar dados no formato esperado pelo resto do código
-        dados_responsaveis = {}
-        
-        for responsavel in responsaveis_com_dividas:
-            responsavel_id = responsavel['id']
-            dados_responsaveis[responsavel_id] = {
-                'responsavel': {
-                    'id': responsavel_id,
-                    'nome': responsavel.get('nome', ''),
-                    'sobrenome': responsavel.get('sobrenome', ''),
-                    'contato': responsavel.get('contato', '')
-                },
-                'alunos': {}
-            }
-            
-            # Processar cada aluno com dívidas
-            for aluno in responsavel.get('alunos', []):
-                aluno_id = aluno['id']
-                
-                # Enriquecer compras com informações de produtos (OTIMIZADO)
-                compras_enriquecidas = []
-                for compra in aluno.get('compras_pendentes', []):
-                    compra_enriquecida = compra.copy()
-                    
-                    # Buscar produtos desta compra usando dados já carregados (OTIMIZADO)
-                    compra_id = compra['id']
-                    produtos_da_compra = []
-                    
-                    # Usar o mapeamento já carregado em vez de fazer nova requisição
-                    if compra_id in produtos_por_compra:
-                        for pc in produtos_por_compra[compra_id]:
-                            produto_id = pc['produto_id']
-                            quantidade = pc['quantidade']
-                            
-                            if produto_id in produtos_dict:
-                                produto = produtos_dict[produto_id]
-                                produto_info = {
-                                    'nome': produto.get('nome', 'Produto sem nome'),
-                                    'quantidade': quantidade,
-                                    'valor_unitario': produto.get('valor', 0)
-                                }
-                                produtos_da_compra.append(produto_info)
-                    
-                    # Criar descrição detalhada
-                    if produtos_da_compra:
-                        descricoes = []
-                        for p in produtos_da_compra:
-                            if p['quantidade'] > 1:
-                                descricoes.append(f"{p['quantidade']}x {p['nome']}")
-                            else:
-                                descricoes.append(p['nome'])
-                        compra_enriquecida['descricao_produtos'] = " + ".join(descricoes)
-                    else:
-                        # Usar observações da compra como fallback
-                        compra_enriquecida['descricao_produtos'] = compra.get('observacoes') or 'Produto não especificado'
-                    
-                    compras_enriquecidas.append(compra_enriquecida)
-                
-                dados_responsaveis[responsavel_id]['alunos'][aluno_id] = {
-                    'dados_aluno': {
-                        'id': aluno_id,
-                        'nome': aluno.get('nome', ''),
-                        'sobrenome': aluno.get('sobrenome', '')
-                    },
-                    'compras': compras_enriquecidas,
-                    'total_devido': aluno.get('total_devido', 0.0)
-                }
-        
-        return dados_responsaveis
+        # Join produtos_comprados × produtos em uma única passada: cada relação
+        # já vira o trecho de texto da descrição da sua compra
+        partes_por_compra = defaultdict(list)
+        for pc in produtos_comprados:
+            produto = produtos_dict.get(pc['produto_id'])
+            if produto:
+                nome_produto = produto.get('nome', 'Produto sem nome')
+                quantidade = pc['quantidade']
+                partes_por_compra[pc['compra_id']].append(
+                    f"{quantidade}x {nome_produto}" if quantidade > 1 else nome_produto
+                )
+        
+        descricao_por_compra = {
+            compra_id: " + ".join(partes)
+            for compra_id, partes in partes_por_compra.items()
+        }
+        
+        # Os dados já vêm agrupados por responsável e aluno; basta devolver
+        # a lista original junto com o mapa de descrições, sem reorganizar
+        return responsaveis_com_dividas, descricao_por_compra
         
     except Exception as e:
         print(f"❌ Erro ao buscar detalhes do consumo: {e}")
-        return {}
+        return [], {}
+
+def iter_dados_responsaveis(responsaveis_com_dividas):
+    """Percorrer responsáveis e alunos sob demanda, com o total de cada responsável"""
+    for responsavel in responsaveis_com_dividas:
+        alunos = responsavel.get('alunos', [])
+        total_responsavel = sum(aluno.get('total_devido', 0.0) for aluno in alunos)
+        yield responsavel, alunos, total_responsavel
 
-def gerar_csv_detalhado():
+def gerar_csv_detalhado(detalhes=None):
     """Gerar CSV com detalhes completos do consumo"""
     try:
-        dados_responsaveis = buscar_detalhes_consumo()
+        if detalhes is None:
+            detalhes = buscar_detalhes_consumo()
+        
+        responsaveis_com_dividas, descricoes = detalhes
         
-        if not dados_responsaveis:
+        if not responsaveis_com_dividas:
             print("⚠️ Nenhum dado encontrado para exportar")
             return None
         
@@ -192,9 +214,11 @@ def gerar_csv_detalhado():
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         nome_arquivo = f"consumo_detalhado_{timestamp}.csv"
         
-        # Criar arquivo CSV
-        with open(nome_arquivo, 'w', newline='', encoding='utf-8') as arquivo_csv:
-            escritor = csv.writer(arquivo_csv)
+        # Criar arquivo CSV: um único TextIOWrapper sobre um BufferedWriter
+        # grande, sem tradução de quebras de linha nem flush por linha
+        arquivo_binario = open(nome_arquivo, 'wb', buffering=1 << 20)
+        with io.TextIOWrapper(arquivo_binario, encoding='utf-8', newline='') as arquivo_csv:
+            escritor = csv.writer(arquivo_csv, quoting=csv.QUOTE_MINIMAL)
             
             # Cabeçalho detalhado
             escritor.writerow([
@@ -213,73 +237,71 @@ def gerar_csv_detalhado():
             contador_alunos = 0
             contador_compras = 0
             
-            # Processar cada responsável
-            for responsavel_id, dados in dados_responsaveis.items():
-                responsavel = dados['responsavel']
-                nome_responsavel = f"{responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}"
+            # Processar cada responsável, escrevendo suas linhas na hora
+            for responsavel, alunos, total_responsavel in iter_dados_responsaveis(responsaveis_com_dividas):
+                nome_responsavel = f"{responsavel.get('nome', '')} {responsavel.get('sobrenome', '')}"
                 telefone_responsavel = formatar_contato(responsavel.get('contato', ''))
-                
-                # Calcular total do responsável
-                total_responsavel = sum(
-                    dados_aluno['total_devido'] 
-                    for dados_aluno in dados['alunos'].values()
-                )
+                total_responsavel_str = formatar_valor(total_responsavel)
                 total_geral += total_responsavel
                 contador_responsaveis += 1
                 
                 primeira_linha_responsavel = True
                 
                 # Processar cada aluno do responsável
-                for aluno_id, dados_aluno in dados['alunos'].items():
-                    aluno = dados_aluno['dados_aluno']
-                    nome_aluno = f"{aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}"
-                    total_aluno = dados_aluno['total_devido']
+                for aluno in alunos:
+                    nome_aluno = f"{aluno.get('nome', '')} {aluno.get('sobrenome', '')}"
+                    total_aluno_str = formatar_valor(aluno.get('total_devido', 0.0))
                     contador_alunos += 1
                     
-                    primeira_linha_aluno = True
-                    
-                    # Processar cada compra do aluno
-                    compras_ordenadas = sorted(
-                        dados_aluno['compras'], 
-                        key=lambda x: x.get('created_at', ''), 
-                        reverse=True
-                    )
+                    # Processar cada compra do aluno (o Supabase já devolve as
+                    # compras ordenadas por created_at desc)
+                    compras_ordenadas = aluno.get('compras_pendentes', [])
+                    contador_compras += len(compras_ordenadas)
                     
+                    # Montar todas as linhas do aluno e escrever de uma vez
+                    linhas = []
                     for compra in compras_ordenadas:
-                        data_compra = formatar_data(compra.get('created_at', ''))
-                        valor_item = float(compra['value'])
-                        # Usar a descrição dos produtos enriquecida
-                        observacoes = compra.get('descricao_produtos', compra.get('observacoes', 'Produto não identificado'))
-                        contador_compras += 1
-                        
-                        # Escrever linha no CSV
-                        escritor.writerow([
-                            nome_responsavel if primeira_linha_responsavel else '',
-                            telefone_responsavel if primeira_linha_responsavel else '',
-                            nome_aluno if primeira_linha_aluno else '',
-                            data_compra,
-                            f"R$ {valor_item:.2f}",
+                        # Descrição dos produtos; observações como fallback
+                        observacoes = (
+                            descricoes.get(compra['id'])
+                            or compra.get('observacoes')
+                            or 'Produto não especificado'
+                        )
+                        linhas.append([
+                            '',
+                            '',
+                            '',
+                            formatar_data(compra.get('created_at', '')),
+                            formatar_valor(compra['value']),
                             observacoes,
-                            f"R$ {total_aluno:.2f}" if primeira_linha_aluno else '',
-                            f"R$ {total_responsavel:.2f}" if primeira_linha_responsavel else ''
+                            '',
+                            ''
                         ])
-                        
-                        primeira_linha_responsavel = False
-                        primeira_linha_aluno = False
                     
-                    # Se aluno não tem compras, adicionar linha vazia
-                    if not compras_ordenadas:
-                        escritor.writerow([
-                            nome_responsavel if primeira_linha_responsavel else '',
-                            telefone_responsavel if primeira_linha_responsavel else '',
+                    if linhas:
+                        linhas[0][2] = nome_aluno
+                        linhas[0][6] = total_aluno_str
+                    else:
+                        # Se aluno não tem compras, adicionar linha vazia
+                        linhas.append([
+                            '',
+                            '',
                             nome_aluno,
                             'Sem compras',
                             'R$ 0,00',
                             'Nenhuma compra registrada',
-                            f"R$ {total_aluno:.2f}",
-                            f"R$ {total_responsavel:.2f}" if primeira_linha_responsavel else ''
+                            total_aluno_str,
+                            ''
                         ])
+                    
+                    # Dados do responsável apenas na primeira linha do grupo
+                    if primeira_linha_responsavel:
+                        linhas[0][0] = nome_responsavel
+                        linhas[0][1] = telefone_responsavel
+                        linhas[0][7] = total_responsavel_str
                         primeira_linha_responsavel = False
+                    
+                    escritor.writerows(linhas)
         
         print(f"✅ Arquivo CSV detalhado gerado: {nome_arquivo}")
         print(f"📊 Estatísticas:")
@@ -294,38 +316,34 @@ def gerar_csv_detalhado():
         print(f"❌ Erro ao gerar CSV detalhado: {e}")
         return None
 
-def gerar_relatorio_resumido():
+def gerar_relatorio_resumido(detalhes=None):
     """Gerar relatório resumido na tela"""
     try:
-        dados_responsaveis = buscar_detalhes_consumo()
+        if detalhes is None:
+            detalhes = buscar_detalhes_consumo()
+        
+        responsaveis_com_dividas, _ = detalhes
         
-        if not dados_responsaveis:
+        if not responsaveis_com_dividas:
             print("⚠️ Nenhum dado encontrado")
             return
         
         print("\n📊 RELATÓRIO RESUMIDO:")
         print("=" * 80)
         
-        for responsavel_id, dados in dados_responsaveis.items():
-            responsavel = dados['responsavel']
-            nome_responsavel = f"{responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}"
+        for responsavel, alunos, total_responsavel in iter_dados_responsaveis(responsaveis_com_dividas):
+            nome_responsavel = f"{responsavel.get('nome', '')} {responsavel.get('sobrenome', '')}"
             telefone = formatar_contato(responsavel.get('contato', ''))
             
-            total_responsavel = sum(
-                dados_aluno['total_devido'] 
-                for dados_aluno in dados['alunos'].values()
-            )
-            
             print(f"\n👤 {nome_responsavel}")
             print(f"📞 {telefone}")
             print(f"💰 Total devido: R$ {total_responsavel:.2f}")
-            print(f"👥 Alunos: {len(dados['alunos'])}")
+            print(f"👥 Alunos: {len(alunos)}")
             
-            for aluno_id, dados_aluno in dados['alunos'].items():
-                aluno = dados_aluno['dados_aluno']
-                nome_aluno = f"{aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}"
-                total_aluno = dados_aluno['total_devido']
-                qtd_compras = len(dados_aluno['compras'])
+            for aluno in alunos:
+                nome_aluno = f"{aluno.get('nome', '')} {aluno.get('sobrenome', '')}"
+                total_aluno = aluno.get('total_devido', 0.0)
+                qtd_compras = len(aluno.get('compras_pendentes', []))
                 
                 print(f"   🎓 {nome_aluno}: R$ {total_aluno:.2f} ({qtd_compras} compras)")
         
@@ -342,15 +360,18 @@ def main():
     print("=" * 60)
     
     try:
+        # Buscar os dados uma única vez para o resumo e para o CSV
+        detalhes = buscar_detalhes_consumo()
+        
         # Gerar relatório resumido na tela
-        gerar_relatorio_resumido()
+        gerar_relatorio_resumido(detalhes)
         
         print("\n" + "=" * 60)
         print("📄 GERANDO ARQUIVO CSV DETALHADO...")
         print("=" * 60)
         
         # Gerar CSV detalhado
-        arquivo_gerado = gerar_csv_detalhado()
+        arquivo_gerado = gerar_csv_detalhado(detalhes)
         
         if arquivo_gerado:
             print(f"\n🎉 Sucesso! Arquivo CSV detalhado gerado: {arquivo_gerado}")
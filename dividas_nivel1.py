@@ -5,7 +5,6 @@ Script para listar responsáveis nível 1 com alunos que possuem dívidas
 
 import os
 import csv
-import re
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -14,32 +13,7 @@ load_dotenv()
 
 # Importar nossa classe
 from responsaveis_requests import SupabaseRequests, exibir_responsaveis_nivel1_com_dividas
-
-def formatar_contato(contato):
-    """Formatar contato para o padrão (84) 99695-2876"""
-    if not contato:
-        return "N/A"
-    
-    # Remover tudo que não é número
-    apenas_numeros = re.sub(r'[^0-9]', '', contato)
-    
-    # Se tem 11 dígitos (padrão brasileiro com DDD)
-    if len(apenas_numeros) == 11:
-        ddd = apenas_numeros[:2]
-        parte1 = apenas_numeros[2:7]
-        parte2 = apenas_numeros[7:11]
-        return f"({ddd}) {parte1}-{parte2}"
-    
-    # Se tem 10 dígitos (sem o 9)
-    elif len(apenas_numeros) == 10:
-        ddd = apenas_numeros[:2]
-        parte1 = apenas_numeros[2:6]
-        parte2 = apenas_numeros[6:10]
-        return f"({ddd}) {parte1}-{parte2}"
-    
-    # Se não conseguir formatar, retornar original
-    else:
-        return contato
+from formatters import formatar_contato
 
 def gerar_csv_responsaveis_com_dividas():
     """Gerar CSV com responsáveis que têm dívidas"""
@@ -1,4 +1,5 @@
-from main import SupabaseConnection
+from main import get_conn
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import json
 
@@ -6,7 +7,7 @@ def exemplo_crud_usuarios():
     """Exemplo completo de operações CRUD com tabela de usuários"""
     try:
         # Conectar ao Supabase
-        supabase_conn = SupabaseConnection()
+        supabase_conn = get_conn()
         
         # 1. Inserir um novo usuário
         print("🔄 Inserindo novo usuário...")
@@ -19,7 +20,10 @@ def exemplo_crud_usuarios():
         }
         
         resultado_insert = supabase_conn.insert_data('usuarios', novo_usuario)
-        if resultado_insert:
+        usuario_inserido = None
+        if resultado_insert and resultado_insert.data:
+            # O insert já devolve a linha criada (RETURNING); reaproveitá-la
+            usuario_inserido = resultado_insert.data[0]
             print(f"✅ Usuário inserido: {json.dumps(resultado_insert.data, indent=2)}")
         
         # 2. Buscar usuários
@@ -30,14 +34,10 @@ def exemplo_crud_usuarios():
             for usuario in usuarios:
                 print(f"   - ID: {usuario['id']}, Nome: {usuario['nome']}, Email: {usuario['email']}")
         
-        # 3. Buscar usuário específico
+        # 3. Usuário específico (linha devolvida pelo insert, sem nova consulta)
         print("\n🎯 Buscando usuário específico...")
-        usuario_especifico = supabase_conn.select_data(
-            'usuarios', 
-            filters={'email': 'maria@email.com'}
-        )
-        if usuario_especifico:
-            print(f"👤 Usuário encontrado: {usuario_especifico[0]['nome']}")
+        if usuario_inserido:
+            print(f"👤 Usuário encontrado: {usuario_inserido['nome']}")
         
         # 4. Atualizar usuário
         print("\n✏️ Atualizando usuário...")
@@ -53,15 +53,11 @@ def exemplo_crud_usuarios():
             {'email': 'maria@email.com'}
         )
         
-        # 5. Confirmar atualização
+        # 5. Confirmar atualização (o update também devolve as linhas alteradas)
         if resultado_update:
             print("✅ Usuário atualizado com sucesso!")
-            usuario_atualizado = supabase_conn.select_data(
-                'usuarios', 
-                filters={'email': 'maria@email.com'}
-            )
-            if usuario_atualizado:
-                print(f"👤 Nome atualizado: {usuario_atualizado[0]['nome']}")
+            if resultado_update.data:
+                print(f"👤 Nome atualizado: {resultado_update.data[0]['nome']}")
         
         # 6. Deletar usuário (descomente para usar)
         # print("\n🗑️ Deletando usuário...")
@@ -75,39 +71,53 @@ def exemplo_crud_usuarios():
 def exemplo_consultas_avancadas():
     """Exemplos de consultas mais avançadas"""
     try:
-        supabase_conn = SupabaseConnection()
+        supabase_conn = get_conn()
         
         print("🔍 Executando consultas avançadas...")
         
-        # Buscar usuários ativos com idade maior que 25
-        print("\n📊 Buscando usuários ativos com idade > 25...")
-        usuarios_ativos = supabase_conn.client.table('usuarios')\
-            .select('nome, email, idade')\
-            .eq('ativo', True)\
-            .gt('idade', 25)\
-            .order('idade')\
-            .execute()
+        # As três consultas são independentes: disparar em paralelo, todas
+        # pelo mesmo cliente, e aguardar os resultados
+        client = supabase_conn.client
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            # Buscar usuários ativos com idade maior que 25
+            futuro_ativos = executor.submit(
+                client.table('usuarios')
+                    .select('nome, email, idade')
+                    .eq('ativo', True)
+                    .gt('idade', 25)
+                    .order('idade')
+                    .execute
+            )
+            
+            # Contar total de usuários
+            futuro_total = executor.submit(
+                client.table('usuarios')
+                    .select('id', count='exact')
+                    .execute
+            )
+            
+            # Buscar usuários com paginação
+            futuro_paginados = executor.submit(
+                client.table('usuarios')
+                    .select('nome, email')
+                    .range(0, 4)
+                    .execute
+            )
+            
+            usuarios_ativos = futuro_ativos.result()
+            total_usuarios = futuro_total.result()
+            usuarios_paginados = futuro_paginados.result()
         
+        print("\n📊 Buscando usuários ativos com idade > 25...")
         if usuarios_ativos.data:
             print(f"👥 {len(usuarios_ativos.data)} usuários encontrados:")
             for usuario in usuarios_ativos.data:
                 print(f"   - {usuario['nome']}: {usuario['idade']} anos")
         
-        # Contar total de usuários
         print("\n📈 Contando usuários...")
-        total_usuarios = supabase_conn.client.table('usuarios')\
-            .select('id', count='exact')\
-            .execute()
-        
         print(f"👥 Total de usuários: {total_usuarios.count}")
         
-        # Buscar usuários com paginação
         print("\n📄 Buscando usuários com paginação...")
-        usuarios_paginados = supabase_conn.client.table('usuarios')\
-            .select('nome, email')\
-            .range(0, 4)\
-            .execute()
-        
         if usuarios_paginados.data:
             print(f"📋 Primeiros 5 usuários:")
             for usuario in usuarios_paginados.data:
@@ -119,7 +129,7 @@ def exemplo_consultas_avancadas():
 def exemplo_conexao_direta():
     """Exemplo de conexão direta com PostgreSQL"""
     try:
-        supabase_conn = SupabaseConnection()
+        supabase_conn = get_conn()
         
         print("🔗 Testando conexão direta com PostgreSQL...")
         
@@ -131,7 +141,7 @@ def exemplo_conexao_direta():
             # Consultar versão do banco
             cursor.execute("SELECT version();")
             versao = cursor.fetchone()
-            print(f"📊 Versão do PostgreSQL: {versao['version']}")
+            print(f"📊 Versão do PostgreSQL: {versao[0]}")
             
             # Consultar tabelas existentes
             cursor.execute("""
@@ -143,12 +153,12 @@ def exemplo_conexao_direta():
             
             tabelas = cursor.fetchall()
             print(f"📋 Tabelas encontradas: {len(tabelas)}")
-            for tabela in tabelas:
-                print(f"   - {tabela['table_name']}")
+            for (nome_tabela,) in tabelas:
+                print(f"   - {nome_tabela}")
             
-            # Fechar conexão
+            # Fechar cursor e devolver a conexão ao pool
             cursor.close()
-            conn.close()
+            supabase_conn.release_database_connection(conn)
             print("✅ Conexão direta finalizada")
         
     except Exception as e:
@@ -157,7 +167,7 @@ def exemplo_conexao_direta():
 def exemplo_autenticacao():
     """Exemplo de autenticação de usuário"""
     try:
-        supabase_conn = SupabaseConnection()
+        supabase_conn = get_conn()
         
         print("🔐 Exemplos de autenticação...")
         
@@ -1,17 +1,37 @@
-from main import SupabaseConnection
+from main import get_conn
 from datetime import datetime
+from functools import lru_cache
 import json
+from operator import itemgetter
+
+# Campos mostrados na tabela e nos detalhes
+CAMPOS_EXIBIDOS = ('id', 'nome', 'sobrenome', 'contato')
+
+@lru_cache(maxsize=4096)
+def _parse_iso(data_str: str):
+    """Converte timestamp ISO do Supabase em datetime (memoizado: datas se repetem)"""
+    return datetime.fromisoformat(data_str.replace('Z', '+00:00'))
+
+def _obter_responsaveis(supabase_conn):
+    """
+    Busca os responsáveis. O cache fica no select_data (ttl_cache), que é
+    invalidado pelas escritas da mesma conexão
+    """
+    return supabase_conn.select_data(
+        'responsaveis',
+        columns='id,nome,sobrenome,contato,created_at,updated_at'
+    )
 
 def exibir_responsaveis():
     """Exibe todos os registros da tabela responsaveis de forma organizada"""
     try:
         # Conectar ao Supabase
         print("🔄 Conectando ao Supabase...")
-        supabase_conn = SupabaseConnection()
+        supabase_conn = get_conn()
         
         # Buscar todos os responsáveis
         print("📋 Buscando registros da tabela 'responsaveis'...")
-        responsaveis = supabase_conn.select_data('responsaveis')
+        responsaveis = _obter_responsaveis(supabase_conn)
         
         if not responsaveis:
             print("⚠️ Nenhum registro encontrado na tabela 'responsaveis'")
@@ -23,14 +43,18 @@ def exibir_responsaveis():
         print(f"{'ID':<36} | {'NOME':<20} | {'SOBRENOME':<20} | {'CONTATO':<15}")
         print("-" * 80)
         
-        # Exibir cada responsável
-        for responsavel in responsaveis:
-            id_short = str(responsavel.get('id', ''))[:8] + '...' if responsavel.get('id') else 'N/A'
-            nome = responsavel.get('nome', 'N/A')[:18]
-            sobrenome = responsavel.get('sobrenome', 'N/A')[:18]
-            contato = responsavel.get('contato', 'N/A')[:13]
-            
-            print(f"{id_short:<36} | {nome:<20} | {sobrenome:<20} | {contato:<15}")
+        # _obter_responsaveis seleciona exatamente essas colunas, então todas as
+        # linhas as têm: itemgetter as extrai sem um .get por campo (e sem
+        # alterar as linhas, que são compartilhadas pelo cache)
+        obter_campos = itemgetter(*CAMPOS_EXIBIDOS)
+        
+        # Exibir cada responsável (linhas montadas numa lista, um único print)
+        formatar_linha = '{:<36} | {:<20} | {:<20} | {:<15}'.format
+        linhas = []
+        for rid, nome, sobrenome, contato in map(obter_campos, responsaveis):
+            id_short = str(rid)[:8] + '...' if rid else 'N/A'
+            linhas.append(formatar_linha(id_short, nome[:18], sobrenome[:18], contato[:13]))
+        print('\n'.join(linhas))
         
         print("=" * 80)
         
@@ -38,30 +62,38 @@ def exibir_responsaveis():
         print("\n📄 DETALHES COMPLETOS:")
         print("-" * 50)
         
+        linhas = []
+        total = len(responsaveis)
         for i, responsavel in enumerate(responsaveis, 1):
-            print(f"\n{i}. RESPONSÁVEL:")
-            print(f"   🆔 ID: {responsavel.get('id', 'N/A')}")
-            print(f"   👤 Nome: {responsavel.get('nome', 'N/A')}")
-            print(f"   👤 Sobrenome: {responsavel.get('sobrenome', 'N/A')}")
-            print(f"   📞 Contato: {responsavel.get('contato', 'N/A')}")
+            # Ler cada campo uma única vez
+            rid, nome, sobrenome, contato = obter_campos(responsavel)
+            criado = responsavel.get('created_at')
+            atualizado = responsavel.get('updated_at')
+            
+            linhas.append(f"\n{i}. RESPONSÁVEL:")
+            linhas.append(f"   🆔 ID: {rid}")
+            linhas.append(f"   👤 Nome: {nome}")
+            linhas.append(f"   👤 Sobrenome: {sobrenome}")
+            linhas.append(f"   📞 Contato: {contato}")
             
             # Formatar datas se existirem
-            if responsavel.get('created_at'):
+            if criado:
                 try:
-                    created_at = datetime.fromisoformat(responsavel['created_at'].replace('Z', '+00:00'))
-                    print(f"   📅 Criado em: {created_at.strftime('%d/%m/%Y às %H:%M:%S')}")
+                    created_at = _parse_iso(criado)
+                    linhas.append(f"   📅 Criado em: {created_at.strftime('%d/%m/%Y às %H:%M:%S')}")
                 except:
-                    print(f"   📅 Criado em: {responsavel.get('created_at', 'N/A')}")
+                    linhas.append(f"   📅 Criado em: {criado}")
             
-            if responsavel.get('updated_at'):
+            if atualizado:
                 try:
-                    updated_at = datetime.fromisoformat(responsavel['updated_at'].replace('Z', '+00:00'))
-                    print(f"   🔄 Atualizado em: {updated_at.strftime('%d/%m/%Y às %H:%M:%S')}")
+                    updated_at = _parse_iso(atualizado)
+                    linhas.append(f"   🔄 Atualizado em: {updated_at.strftime('%d/%m/%Y às %H:%M:%S')}")
                 except:
-                    print(f"   🔄 Atualizado em: {responsavel.get('updated_at', 'N/A')}")
+                    linhas.append(f"   🔄 Atualizado em: {atualizado}")
             
-            if i < len(responsaveis):
-                print("   " + "-" * 40)
+            if i < total:
+                linhas.append("   " + "-" * 40)
+        print('\n'.join(linhas))
         
         print(f"\n📊 RESUMO:")
         print(f"   Total de responsáveis: {len(responsaveis)}")
@@ -78,8 +110,8 @@ def exibir_responsaveis():
 def exibir_responsaveis_json():
     """Exibe os responsáveis em formato JSON para debug"""
     try:
-        supabase_conn = SupabaseConnection()
-        responsaveis = supabase_conn.select_data('responsaveis')
+        supabase_conn = get_conn()
+        responsaveis = _obter_responsaveis(supabase_conn)
         
         if responsaveis:
             print("\n📄 DADOS EM FORMATO JSON:")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Funções de formatação compartilhadas pelos scripts de relatório
+(telefone, data e valores monetários)
+"""
+
+import re
+from functools import lru_cache
+
+# Compilado uma única vez: formatar_contato é chamada para cada responsável
+_NAO_DIGITOS_RE = re.compile(r'[^0-9]+')
+
+@lru_cache(maxsize=4096)
+def formatar_contato(contato):
+    """Formatar contato para o padrão (84) 99695-2876"""
+    if not contato:
+        return "N/A"
+    
+    # Remover tudo que não é número
+    apenas_numeros = _NAO_DIGITOS_RE.sub('', contato)
+    
+    # Se tem 11 dígitos (padrão brasileiro com DDD)
+    if len(apenas_numeros) == 11:
+        ddd = apenas_numeros[:2]
+        parte1 = apenas_numeros[2:7]
+        parte2 = apenas_numeros[7:11]
+        return f"({ddd}) {parte1}-{parte2}"
+    
+    # Se tem 10 dígitos (sem o 9)
+    elif len(apenas_numeros) == 10:
+        ddd = apenas_numeros[:2]
+        parte1 = apenas_numeros[2:6]
+        parte2 = apenas_numeros[6:10]
+        return f"({ddd}) {parte1}-{parte2}"
+    
+    # Se não conseguir formatar, retornar original
+    else:
+        return contato
+
+def formatar_data(data_str):
+    """Formatar data para formato brasileiro dd/mm/yyyy"""
+    if not data_str:
+        return "N/A"
+    
+    # Só a parte YYYY-MM-DD do timestamp ISO aparece na saída, então o cache é
+    # feito por ela: compras do mesmo dia reaproveitam o resultado
+    data_formatada = _formatar_dia_iso(data_str[:10])
+    return data_formatada if data_formatada is not None else data_str
+
+@lru_cache(maxsize=8192)
+def _formatar_dia_iso(dia):
+    """Converter YYYY-MM-DD em dd/mm/yyyy por fatiamento (None se inválido)"""
+    ano, mes, dia_mes = dia[0:4], dia[5:7], dia[8:10]
+    if len(dia) != 10 or dia[4] != '-' or dia[7] != '-' or not (ano + mes + dia_mes).isdigit():
+        return None
+    return f"{dia_mes}/{mes}/{ano}"
+
+@lru_cache(maxsize=1024)
+def formatar_valor(valor):
+    """Formatar valor monetário como R$ 15.00 (valores se repetem muito entre compras)"""
+    return f"R$ {float(valor):.2f}"
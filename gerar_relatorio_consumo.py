@@ -6,9 +6,55 @@ Organiza os dados em formato de nota de consumo legível
 """
 
 import csv
+import io
 import os
 from datetime import datetime
-from collections import defaultdict
+from dataclasses import dataclass, field
+from operator import itemgetter
+
+# Tabelas de tradução para valores em reais: a entrada descarta 'R', '$' e
+# espaços e troca vírgula por ponto; a saída troca o ponto decimal por vírgula
+_BRL_ENTRADA = str.maketrans({',': '.', 'R': None, '$': None, ' ': None})
+_BRL_SAIDA = str.maketrans('.', ',')
+
+@dataclass(slots=True)
+class AlunoConsumo:
+    """Total e compras (data, valor, descrição) de um aluno"""
+    total_aluno: float = 0.0
+    compras: list = field(default_factory=list)
+
+@dataclass(slots=True)
+class ResponsavelConsumo:
+    """Telefone, total e alunos de um responsável"""
+    telefone: str = ''
+    total_geral: float = 0.0
+    alunos: dict = field(default_factory=dict)
+
+def _linhas_preenchidas(leitor):
+    """
+    Percorre as linhas do CSV repetindo responsável, telefone e aluno da
+    linha anterior quando vierem vazios (o CSV só os preenche no início do grupo)
+    """
+    ultimo_responsavel = ""
+    ultimo_telefone = ""
+    ultimo_aluno = ""
+    
+    for linha in leitor:
+        ultimo_responsavel = linha['Responsável'].strip() or ultimo_responsavel
+        ultimo_telefone = linha['Telefone'].strip() or ultimo_telefone
+        ultimo_aluno = linha['Aluno'].strip() or ultimo_aluno
+        yield ultimo_responsavel, ultimo_telefone, ultimo_aluno, linha
+
+def _brl_para_float(valor_str, padrao):
+    """Converte 'R$ 12.50' / 'R$ 12,50' em float; vazio ou inválido devolve o padrão"""
+    try:
+        return float(valor_str.translate(_BRL_ENTRADA))
+    except ValueError:
+        return padrao
+
+def _formatar_brl(valor):
+    """Formata um float como 'R$ 12,50'"""
+    return f"R$ {valor:.2f}".translate(_BRL_SAIDA)
 
 def gerar_relatorio_formatado(arquivo_entrada):
     """
@@ -19,184 +65,156 @@ def gerar_relatorio_formatado(arquivo_entrada):
         print(f"❌ Arquivo não encontrado: {arquivo_entrada}")
         return
     
-    # Estrutura para organizar os dados
-    dados_responsaveis = defaultdict(lambda: {
-        'telefone': '',
-        'total_geral': 0.0,
-        'alunos': defaultdict(lambda: {
-            'total_aluno': 0.0,
-            'compras': []
-        })
-    })
+    # Estrutura para organizar os dados: nome do responsável -> ResponsavelConsumo
+    dados_responsaveis = {}
     
     # Ler o arquivo CSV
     print("📊 Processando dados do CSV...")
     
-    # Variáveis para manter o contexto das linhas anteriores
-    ultimo_responsavel = ""
-    ultimo_telefone = ""
-    ultimo_aluno = ""
+    # Totais conhecidos das linhas anteriores (o CSV só preenche no início do grupo)
     ultimo_total_aluno = 0.0
     ultimo_total_responsavel = 0.0
     
+    # Todas as compras numa lista única (aluno, data, valor, descrição),
+    # ordenada uma só vez no fim em vez de um sort por aluno
+    todas_compras = []
+    
     with open(arquivo_entrada, 'r', encoding='utf-8') as arquivo:
         leitor = csv.DictReader(arquivo)
         
-        for linha in leitor:
-            responsavel = linha['Responsável'].strip()
-            telefone = linha['Telefone'].strip()
-            aluno = linha['Aluno'].strip()
+        for responsavel, telefone, aluno, linha in _linhas_preenchidas(leitor):
             data_compra = linha['Data Compra'].strip()
-            valor_str = linha['Valor Item (R$)'].strip()
-            descricao = linha['Descrição/Observações'].strip()
-            total_aluno_str = linha['Total Aluno (R$)'].strip()
-            total_responsavel_str = linha['Total Responsável (R$)'].strip()
-            
-            # Se os campos principais estão vazios, usar os últimos valores conhecidos
-            if not responsavel and ultimo_responsavel:
-                responsavel = ultimo_responsavel
-            if not telefone and ultimo_telefone:
-                telefone = ultimo_telefone
-            if not aluno and ultimo_aluno:
-                aluno = ultimo_aluno
-            if not total_aluno_str and ultimo_total_aluno > 0:
-                total_aluno_str = f"R$ {ultimo_total_aluno:.2f}".replace('.', ',')
-            if not total_responsavel_str and ultimo_total_responsavel > 0:
-                total_responsavel_str = f"R$ {ultimo_total_responsavel:.2f}".replace('.', ',')
             
-            # Atualizar últimos valores conhecidos quando não estão vazios
-            if responsavel:
-                ultimo_responsavel = responsavel
-            if telefone:
-                ultimo_telefone = telefone
-            if aluno:
-                ultimo_aluno = aluno
-                
             # Pular linhas completamente vazias
             if not responsavel or not aluno or not data_compra:
                 continue
             
-            # Extrair valor numérico
-            try:
-                valor = float(valor_str.replace('R$', '').replace(',', '.').strip())
-            except:
-                valor = 0.0
+            descricao = linha['Descrição/Observações'].strip()
+            
+            # Extrair valores numéricos (totais vazios herdam o último conhecido)
+            valor = _brl_para_float(linha['Valor Item (R$)'], 0.0)
             
-            # Extrair total do aluno
-            try:
-                total_aluno = float(total_aluno_str.replace('R$', '').replace(',', '.').strip())
-                if total_aluno > 0:
-                    ultimo_total_aluno = total_aluno
-            except:
-                total_aluno = ultimo_total_aluno
+            total_aluno = _brl_para_float(linha['Total Aluno (R$)'], ultimo_total_aluno)
+            if total_aluno > 0:
+                ultimo_total_aluno = total_aluno
             
-            # Extrair total do responsável
-            try:
-                total_responsavel = float(total_responsavel_str.replace('R$', '').replace(',', '.').strip())
-                if total_responsavel > 0:
-                    ultimo_total_responsavel = total_responsavel
-            except:
-                total_responsavel = ultimo_total_responsavel
+            total_responsavel = _brl_para_float(linha['Total Responsável (R$)'], ultimo_total_responsavel)
+            if total_responsavel > 0:
+                ultimo_total_responsavel = total_responsavel
             
-            # Organizar dados
-            dados_responsaveis[responsavel]['telefone'] = telefone
-            dados_responsaveis[responsavel]['total_geral'] = total_responsavel
-            dados_responsaveis[responsavel]['alunos'][aluno]['total_aluno'] = total_aluno
+            # Organizar dados (um único lookup por nível do agrupamento)
+            dados = dados_responsaveis.get(responsavel)
+            if dados is None:
+                dados = dados_responsaveis[responsavel] = ResponsavelConsumo()
+            dados.telefone = telefone
+            dados.total_geral = total_responsavel
             
-            # Adicionar compra se tiver dados válidos
+            dados_aluno = dados.alunos.get(aluno)
+            if dados_aluno is None:
+                dados_aluno = dados.alunos[aluno] = AlunoConsumo()
+            dados_aluno.total_aluno = total_aluno
+            
+            # Guardar compra se tiver dados válidos, como tupla compacta
             if data_compra and valor > 0:
-                dados_responsaveis[responsavel]['alunos'][aluno]['compras'].append({
-                    'data': data_compra,
-                    'valor': valor,
-                    'descricao': descricao or 'Não especificado'
-                })
+                todas_compras.append((dados_aluno, data_compra, valor, descricao or 'Não especificado'))
+    
+    # Ordenar todas as compras por data (desc) de uma vez e distribuí-las: como
+    # o sort é estável, cada aluno recebe suas compras já na ordem do relatório
+    todas_compras.sort(key=itemgetter(1), reverse=True)
+    for dados_aluno, data_compra, valor, descricao in todas_compras:
+        dados_aluno.compras.append((data_compra, valor, descricao))
     
     # Gerar relatório formatado
     nome_arquivo = f"relatorio_consumo_formatado_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
     
     print(f"📄 Gerando relatório formatado: {nome_arquivo}")
     
-    with open(nome_arquivo, 'w', encoding='utf-8', newline='') as arquivo:
-        writer = csv.writer(arquivo)
-        
-        # Cabeçalho principal
-        writer.writerow([])
-        writer.writerow(['=' * 80])
-        writer.writerow(['                    RELATÓRIO DE CONSUMO - CANTINA ESCOLAR'])
-        writer.writerow(['                    Data de Geração:', datetime.now().strftime('%d/%m/%Y às %H:%M')])
-        writer.writerow(['=' * 80])
-        writer.writerow([])
+    # Montar o relatório inteiro em memória e gravar o arquivo de uma vez
+    buffer = io.StringIO(newline='')
+    writer = csv.writer(buffer)
+    
+    # Cabeçalho principal
+    writer.writerows((
+        (),
+        ('=' * 80,),
+        ('                    RELATÓRIO DE CONSUMO - CANTINA ESCOLAR',),
+        ('                    Data de Geração:', datetime.now().strftime('%d/%m/%Y às %H:%M')),
+        ('=' * 80,),
+        (),
+    ))
+    
+    total_geral_cantina = 0.0
+    contador_responsaveis = 0
+    
+    # Linhas de cada responsável são acumuladas e escritas de uma vez
+    linhas = []
+    
+    # Processar cada responsável
+    for responsavel, dados in sorted(dados_responsaveis.items()):
+        if not responsavel:
+            continue
+            
+        contador_responsaveis += 1
+        total_geral_cantina += dados.total_geral
         
-        total_geral_cantina = 0.0
-        contador_responsaveis = 0
+        # Cabeçalho do responsável
+        linhas.extend((
+            ('-' * 80,),
+            (f"RESPONSÁVEL #{contador_responsaveis:03d}",),
+            ('-' * 80,),
+            (f"Nome: {responsavel}",),
+            (f"Telefone: {dados.telefone or 'Não informado'}",),
+            (f"Total Geral: {_formatar_brl(dados.total_geral)}",),
+            (),
+        ))
         
-        # Processar cada responsável
-        for responsavel, dados in sorted(dados_responsaveis.items()):
-            if not responsavel:
+        # Processar cada aluno
+        for aluno, dados_aluno in sorted(dados.alunos.items()):
+            if not aluno:
                 continue
-                
-            contador_responsaveis += 1
-            total_geral_cantina += dados['total_geral']
             
-            # Cabeçalho do responsável
-            writer.writerow(['-' * 80])
-            writer.writerow([f"RESPONSÁVEL #{contador_responsaveis:03d}"])
-            writer.writerow(['-' * 80])
-            writer.writerow([f"Nome: {responsavel}"])
-            writer.writerow([f"Telefone: {dados['telefone'] or 'Não informado'}"])
-            writer.writerow([f"Total Geral: R$ {dados['total_geral']:.2f}".replace('.', ',')])
-            writer.writerow([])
-            
-            # Processar cada aluno
-            for aluno, dados_aluno in sorted(dados['alunos'].items()):
-                if not aluno:
-                    continue
-                    
-                writer.writerow([f"  📚 ALUNO: {aluno}"])
-                writer.writerow([f"  💰 Total do Aluno: R$ {dados_aluno['total_aluno']:.2f}".replace('.', ',')])
-                writer.writerow([])
-                
+            linhas.extend((
+                (f"  📚 ALUNO: {aluno}",),
+                (f"  💰 Total do Aluno: {_formatar_brl(dados_aluno.total_aluno)}",),
+                (),
                 # Cabeçalho das compras
-                writer.writerow(['    Data', 'Valor (R$)', 'Descrição do Consumo'])
-                writer.writerow(['    ' + '-' * 10, '-' * 12, '-' * 40])
-                
-                # Listar compras ordenadas por data
-                compras_ordenadas = sorted(
-                    dados_aluno['compras'], 
-                    key=lambda x: x['data'], 
-                    reverse=True
-                )
-                
-                if compras_ordenadas:
-                    for compra in compras_ordenadas:
-                        valor_formatado = f"R$ {compra['valor']:.2f}".replace('.', ',')
-                        writer.writerow([
-                            f"    {compra['data']}", 
-                            valor_formatado, 
-                            compra['descricao']
-                        ])
-                else:
-                    writer.writerow(['    -', '-', 'Nenhuma compra registrada'])
-                
-                writer.writerow([])
+                ('    Data', 'Valor (R$)', 'Descrição do Consumo'),
+                ('    ' + '-' * 10, '-' * 12, '-' * 40),
+            ))
+            
+            # Listar compras (já ordenadas por data)
+            if dados_aluno.compras:
+                for data_compra, valor, descricao in dados_aluno.compras:
+                    linhas.append((f"    {data_compra}", _formatar_brl(valor), descricao))
+            else:
+                linhas.append(('    -', '-', 'Nenhuma compra registrada'))
             
-            writer.writerow([])
+            linhas.append(())
         
-        # Resumo final
-        writer.writerow(['=' * 80])
-        writer.writerow(['                              RESUMO GERAL'])
-        writer.writerow(['=' * 80])
-        writer.writerow([f"Total de Responsáveis: {contador_responsaveis}"])
-        writer.writerow([f"Total de Alunos: {sum(len(dados['alunos']) for dados in dados_responsaveis.values())}"])
-        writer.writerow([f"VALOR TOTAL GERAL: R$ {total_geral_cantina:.2f}".replace('.', ',')])
-        writer.writerow([])
-        writer.writerow(['Relatório gerado automaticamente pelo Sistema de Gestão da Cantina'])
-        writer.writerow(['=' * 80])
+        linhas.append(())
+        writer.writerows(linhas)
+        linhas.clear()
+    
+    # Resumo final
+    writer.writerows((
+        ('=' * 80,),
+        ('                              RESUMO GERAL',),
+        ('=' * 80,),
+        (f"Total de Responsáveis: {contador_responsaveis}",),
+        (f"Total de Alunos: {sum(len(dados.alunos) for dados in dados_responsaveis.values())}",),
+        (f"VALOR TOTAL GERAL: {_formatar_brl(total_geral_cantina)}",),
+        (),
+        ('Relatório gerado automaticamente pelo Sistema de Gestão da Cantina',),
+        ('=' * 80,),
+    ))
+    
+    with open(nome_arquivo, 'wb') as arquivo:
+        arquivo.write(buffer.getvalue().encode('utf-8'))
     
     print(f"✅ Relatório gerado com sucesso!")
     print(f"📁 Arquivo: {nome_arquivo}")
     print(f"📊 Total de responsáveis: {contador_responsaveis}")
-    print(f"💰 Valor total: R$ {total_geral_cantina:.2f}".replace('.', ','))
+    print(f"💰 Valor total: {_formatar_brl(total_geral_cantina)}")
 
 def main():
     """Função principal"""
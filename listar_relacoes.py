@@ -2,13 +2,23 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from datetime import datetime
+from collections import Counter
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Sessão HTTP compartilhada: reaproveita conexões (keep-alive) entre as requisições
+session = requests.Session()
+adapter = HTTPAdapter(pool_connections=10, pool_maxsize=50, max_retries=3)
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+
 def main():
     """Script para listar relações entre responsáveis e alunos"""
     try:
@@ -27,16 +37,24 @@ def main():
             'Content-Type': 'application/json'
         }
         
+        session.headers.update(headers)
+        
         print("🔄 Buscando relações entre responsáveis e alunos...")
         
-        # Buscar todas as relações
-        response = requests.get(f"{base_url}/relacao", headers=headers)
+        # Buscar todas as relações já com responsável e aluno embutidos
+        # (join feito pelo PostgREST via chave estrangeira, uma única requisição)
+        response = session.get(
+            f"{base_url}/relacao",
+            params={
+                'select': '*,responsaveis(id,nome,sobrenome,contato),alunos(id,nome,sobrenome,serie_id,escola_id)'
+            }
+        )
         
         if response.status_code != 200:
             print(f"❌ Erro ao buscar relações: {response.status_code}")
             return
         
-        relacoes = response.json()
+        relacoes = orjson.loads(response.content)
         
         if not relacoes:
             print("⚠️ Nenhuma relação encontrada")
@@ -45,71 +63,54 @@ def main():
         print(f"✅ {len(relacoes)} relação(ões) encontrada(s)")
         print("\n" + "=" * 100)
         
-        # Para cada relação, buscar dados do responsável e aluno
+        # Acumular a listagem e escrever no stdout de uma só vez
+        saida = []
         for i, relacao in enumerate(relacoes, 1):
-            responsavel_id = relacao.get('responsavel_id')
-            aluno_id = relacao.get('aluno_id')
             nivel = relacao.get('nivel', 'N/A')
             
-            # Buscar dados do responsável
-            resp_response = requests.get(
-                f"{base_url}/responsaveis?id=eq.{responsavel_id}",
-                headers=headers
-            )
+            responsavel = relacao.get('responsaveis') or {}
+            aluno = relacao.get('alunos') or {}
+            
+            saida.append(f"\n{i}. 🔗 RELAÇÃO:")
+            saida.append(f"   👤 Responsável: {responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}")
+            saida.append(f"      📞 Contato: {responsavel.get('contato', 'N/A')}")
+            saida.append(f"      🆔 ID: {responsavel.get('id', 'N/A')}")
+            
+            saida.append(f"   🎓 Aluno: {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
+            saida.append(f"      📚 Série ID: {aluno.get('serie_id', 'N/A')}")
+            saida.append(f"      🏫 Escola ID: {aluno.get('escola_id', 'N/A')}")
+            saida.append(f"      🆔 ID: {aluno.get('id', 'N/A')}")
             
-            # Buscar dados do aluno
-            aluno_response = requests.get(
-                f"{base_url}/alunos?id=eq.{aluno_id}",
-                headers=headers
-            )
+            saida.append(f"   🔗 Nível da Relação: {nivel}")
             
-            if resp_response.status_code == 200 and aluno_response.status_code == 200:
-                responsavel = resp_response.json()[0] if resp_response.json() else {}
-                aluno = aluno_response.json()[0] if aluno_response.json() else {}
-                
-                print(f"\n{i}. 🔗 RELAÇÃO:")
-                print(f"   👤 Responsável: {responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}")
-                print(f"      📞 Contato: {responsavel.get('contato', 'N/A')}")
-                print(f"      🆔 ID: {responsavel.get('id', 'N/A')}")
-                
-                print(f"   🎓 Aluno: {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
-                print(f"      📚 Série ID: {aluno.get('serie_id', 'N/A')}")
-                print(f"      🏫 Escola ID: {aluno.get('escola_id', 'N/A')}")
-                print(f"      🆔 ID: {aluno.get('id', 'N/A')}")
-                
-                print(f"   🔗 Nível da Relação: {nivel}")
-                
-                # Data da relação
-                if relacao.get('created_at'):
-                    try:
-                        data_relacao = datetime.fromisoformat(relacao['created_at'].replace('Z', '+00:00'))
-                        print(f"   📅 Relação criada: {data_relacao.strftime('%d/%m/%Y às %H:%M:%S')}")
-                    except:
-                        print(f"   📅 Relação criada: {relacao.get('created_at', 'N/A')}")
-                
-                if i < len(relacoes):
-                    print("\n" + "-" * 80)
+            # Data da relação
+            if relacao.get('created_at'):
+                try:
+                    data_relacao = datetime.fromisoformat(relacao['created_at'].replace('Z', '+00:00'))
+                    saida.append(f"   📅 Relação criada: {data_relacao.strftime('%d/%m/%Y às %H:%M:%S')}")
+                except:
+                    saida.append(f"   📅 Relação criada: {relacao.get('created_at', 'N/A')}")
+            
+            if i < len(relacoes):
+                saida.append("\n" + "-" * 80)
+        sys.stdout.write('\n'.join(saida) + '\n')
         
         print("\n" + "=" * 100)
         print(f"📊 RESUMO: {len(relacoes)} relações encontradas")
         
-        # Contar quantos responsáveis e alunos únicos
+        # Contar responsáveis/alunos únicos e agrupar por nível numa só passada
         responsaveis_unicos = set()
         alunos_unicos = set()
+        niveis = Counter()
         
         for relacao in relacoes:
             responsaveis_unicos.add(relacao.get('responsavel_id'))
             alunos_unicos.add(relacao.get('aluno_id'))
+            niveis[relacao.get('nivel', 'N/A')] += 1
         
         print(f"   👥 Responsáveis únicos: {len(responsaveis_unicos)}")
         print(f"   🎓 Alunos únicos: {len(alunos_unicos)}")
         
-        # Agrupar por nível se disponível
-        niveis = {}
-        for relacao in relacoes:
-            nivel = relacao.get('nivel', 'N/A')
-            niveis[nivel] = niveis.get(nivel, 0) + 1
-        
         if niveis:
             print(f"   📊 Distribuição por nível:")
             for nivel, quantidade in niveis.items():
@@ -1,16 +1,18 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-from main import SupabaseConnection
+import sys
+
+from main import get_conn
 
 def main():
     """Script simples para listar todos os responsáveis"""
     try:
         # Conectar
-        conn = SupabaseConnection()
+        conn = get_conn()
         
         # Buscar dados
-        dados = conn.select_data('responsaveis')
+        dados = conn.select_data('responsaveis', columns='id,nome,sobrenome,contato')
         
         if not dados:
             print("Nenhum responsável encontrado.")
@@ -19,11 +21,14 @@ def main():
         # Exibir
         print(f"Total: {len(dados)} responsáveis\n")
         
+        # Acumular a listagem e escrever no stdout de uma só vez
+        saida = []
         for i, resp in enumerate(dados, 1):
-            print(f"{i}. {resp.get('nome', '')} {resp.get('sobrenome', '')}")
-            print(f"   Contato: {resp.get('contato', 'N/A')}")
-            print(f"   ID: {resp.get('id', 'N/A')}")
-            print()
+            saida.append(f"{i}. {resp.get('nome', '')} {resp.get('sobrenome', '')}")
+            saida.append(f"   Contato: {resp.get('contato', 'N/A')}")
+            saida.append(f"   ID: {resp.get('id', 'N/A')}")
+            saida.append("")
+        sys.stdout.write('\n'.join(saida) + '\n')
             
     except Exception as e:
         print(f"Erro: {e}")
@@ -1,12 +1,23 @@
 import os
+import time
+from contextlib import contextmanager
+from functools import lru_cache
 from dotenv import load_dotenv
 from supabase import create_client, Client
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+
+from cache import ttl_cache
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
 
+# Pool de conexões diretas: tamanho máximo e idade máxima (em segundos) de uma
+# conexão antes de ser fechada e reaberta, como o pool_recycle do SQLAlchemy,
+# para não reaproveitar conexões já derrubadas pelo pooler do Supabase
+DB_POOL_MAX = 20
+DB_POOL_RECYCLE = 300
+
 class SupabaseConnection:
     def __init__(self):
         """Inicializa a conexão com o Supabase"""
@@ -22,6 +33,10 @@ class SupabaseConnection:
         # Criar cliente do Supabase
         self.client: Client = create_client(self.url, self.key)
         
+        # Pool de conexões diretas com o PostgreSQL (criado sob demanda)
+        self._db_pool = None
+        self._db_conn_criada = {}
+        
     def test_connection(self):
         """Testa a conexão com o Supabase"""
         try:
@@ -34,38 +49,126 @@ class SupabaseConnection:
             return False
     
     def get_database_connection(self):
-        """Retorna uma conexão direta com o banco PostgreSQL"""
+        """
+        Retorna uma conexão direta com o banco PostgreSQL, tirada do pool.
+        Devolva-a com release_database_connection (ou use database_connection).
+        Os cursores devolvem tuplas: para resultados grandes, prefira montar o
+        JSON no próprio banco (row_to_json/json_agg) a criar um dict por linha
+        """
         if not self.database_url:
             raise ValueError("DATABASE_URL não foi definida no arquivo .env")
         
         try:
-            conn = psycopg2.connect(
-                self.database_url,
-                cursor_factory=RealDictCursor
-            )
-            return conn
+            # Pool criado na primeira conexão: as seguintes reaproveitam
+            # conexões já abertas em vez de refazer o handshake TCP/TLS
+            if self._db_pool is None:
+                self._db_pool = ThreadedConnectionPool(
+                    1, DB_POOL_MAX,
+                    self.database_url
+                )
+            
+            # Pre-ping: um SELECT 1 confirma que a conexão ainda está viva (o
+            # pooler do Supabase derruba conexões ociosas sem que conn.closed
+            # mude). Conexões mortas ou mais velhas que DB_POOL_RECYCLE são
+            # descartadas e o pool abre outra no lugar. A idade é contada a
+            # partir da primeira retirada da conexão, não da sua abertura
+            while True:
+                conn = self._db_pool.getconn()
+                agora = time.monotonic()
+                criada = self._db_conn_criada.setdefault(id(conn), agora)
+                if not conn.closed and agora - criada <= DB_POOL_RECYCLE:
+                    try:
+                        with conn.cursor() as cursor:
+                            cursor.execute("SELECT 1")
+                        # Encerra a transação aberta pelo ping
+                        conn.rollback()
+                        return conn
+                    except psycopg2.Error:
+                        pass
+                
+                del self._db_conn_criada[id(conn)]
+                self._db_pool.putconn(conn, close=True)
         except Exception as e:
             print(f"❌ Erro na conexão direta com o banco: {str(e)}")
             return None
     
-    def insert_data(self, table_name: str, data: dict):
-        """Insere dados em uma tabela"""
+    def release_database_connection(self, conn):
+        """Devolve ao pool uma conexão obtida com get_database_connection"""
+        if conn is not None and self._db_pool is not None:
+            # Conexões que caíram durante o uso não voltam para o pool
+            if conn.closed:
+                self._db_conn_criada.pop(id(conn), None)
+            self._db_pool.putconn(conn, close=bool(conn.closed))
+    
+    @contextmanager
+    def database_connection(self):
+        """Context manager que pega uma conexão do pool e a devolve ao final"""
+        conn = self.get_database_connection()
+        try:
+            yield conn
+        finally:
+            self.release_database_connection(conn)
+    
+    @staticmethod
+    def _apply_filters(query, filters: dict = None):
+        """Aplica os filtros de igualdade (coluna = valor) de uma vez com match"""
+        return query.match(filters) if filters else query
+    
+    def insert_data(self, table_name: str, data, upsert: bool = False,
+                    returning: str = 'representation', chunk_size: int = 1000):
+        """
+        Insere dados em uma tabela.
+        
+        `data` pode ser um dicionário (uma linha) ou uma lista de dicionários,
+        enviada em lotes de `chunk_size` linhas por requisição (um único
+        INSERT por lote). Com upsert=True linhas com chave já existente são
+        atualizadas; com returning='minimal' as linhas não voltam na resposta.
+        """
+        linhas = data if isinstance(data, list) else [data]
+        enviadas = 0
         try:
-            response = self.client.table(table_name).insert(data).execute()
+            if not linhas:
+                print(f"⚠️ Nenhum dado para inserir na tabela {table_name}")
+                return None
+            
+            # Cada lote é um INSERT independente: se um falhar, os anteriores já
+            # estão gravados (e são informados na mensagem de erro)
+            inseridas = []
+            try:
+                for inicio in range(0, len(linhas), chunk_size):
+                    lote = linhas[inicio:inicio + chunk_size]
+                    response = self.client.table(table_name).insert(
+                        lote,
+                        upsert=upsert,
+                        returning=returning
+                    ).execute()
+                    inseridas.extend(response.data or [])
+                    enviadas += len(lote)
+            finally:
+                # Também após uma falha parcial: os lotes gravados não podem
+                # ficar escondidos atrás do cache do select_data
+                if enviadas:
+                    self.select_data.cache_clear(self, table_name)
+            
+            # Com vários lotes, a resposta devolvida reúne as linhas de todos
+            if len(linhas) > chunk_size:
+                response.data = inseridas
+            
             print(f"✅ Dados inseridos com sucesso na tabela {table_name}")
             return response
         except Exception as e:
-            print(f"❌ Erro ao inserir dados: {str(e)}")
+            if enviadas:
+                print(f"❌ Erro ao inserir dados: {str(e)} "
+                      f"({enviadas} de {len(linhas)} linhas já foram inseridas antes da falha)")
+            else:
+                print(f"❌ Erro ao inserir dados: {str(e)}")
             return None
     
+    @ttl_cache(seconds=60)
     def select_data(self, table_name: str, columns: str = '*', filters: dict = None):
         """Seleciona dados de uma tabela"""
         try:
-            query = self.client.table(table_name).select(columns)
-            
-            if filters:
-                for key, value in filters.items():
-                    query = query.eq(key, value)
+            query = self._apply_filters(self.client.table(table_name).select(columns), filters)
             
             response = query.execute()
             return response.data
@@ -76,12 +179,10 @@ class SupabaseConnection:
     def update_data(self, table_name: str, data: dict, filters: dict):
         """Atualiza dados em uma tabela"""
         try:
-            query = self.client.table(table_name).update(data)
-            
-            for key, value in filters.items():
-                query = query.eq(key, value)
+            query = self._apply_filters(self.client.table(table_name).update(data), filters)
             
             response = query.execute()
+            self.select_data.cache_clear(self, table_name)
             print(f"✅ Dados atualizados com sucesso na tabela {table_name}")
             return response
         except Exception as e:
@@ -91,12 +192,10 @@ class SupabaseConnection:
     def delete_data(self, table_name: str, filters: dict):
         """Deleta dados de uma tabela"""
         try:
-            query = self.client.table(table_name).delete()
-            
-            for key, value in filters.items():
-                query = query.eq(key, value)
+            query = self._apply_filters(self.client.table(table_name).delete(), filters)
             
             response = query.execute()
+            self.select_data.cache_clear(self, table_name)
             print(f"✅ Dados deletados com sucesso da tabela {table_name}")
             return response
         except Exception as e:
@@ -104,6 +203,12 @@ class SupabaseConnection:
             return None
 
 
+@lru_cache(maxsize=1)
+def get_conn():
+    """Retorna uma instância única de SupabaseConnection, criada na primeira chamada"""
+    return SupabaseConnection()
+
+
 def main():
     """Função principal para demonstrar o uso"""
     try:
@@ -2,13 +2,98 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from datetime import datetime
+from functools import lru_cache
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Sessão HTTP compartilhada: reaproveita conexões (keep-alive) entre as
+# requisições e repete automaticamente falhas transitórias
+session = requests.Session()
+adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=20,
+    max_retries=Retry(total=3, backoff_factor=0.2)
+)
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+
+# Formatos de exibição das datas
+_FMT_DATA_HORA = '%d/%m/%Y às %H:%M:%S'
+_FMT_DATA = '%d/%m/%Y'
+
+# Separadores da listagem (montados uma única vez)
+_SEP = "         " + "- " * 20
+_BAR80 = "=" * 80
+_BAR60 = "=" * 60
+
+# Blocos fixos da listagem, preenchidos de uma vez com format_map
+_TPL_RESPONSAVEL = (
+    "\n{i}. 👤 RESPONSÁVEL:\n"
+    "   📛 Nome: {nome} {sobrenome}\n"
+    "   📞 Contato: {contato}\n"
+    "   🆔 ID: {id}"
+)
+_TPL_ALUNO = (
+    "      {j}. 🎓 {nome} {sobrenome}\n"
+    "         🆔 ID: {id}\n"
+    "         📚 Série ID: {serie_id}\n"
+    "         🏫 Escola ID: {escola_id}"
+)
+
+class _ComPadrao(dict):
+    """Dicionário para os templates: campos ausentes aparecem como 'N/A'"""
+    def __missing__(self, chave):
+        return 'N/A'
+
+# A partir do Python 3.11 o fromisoformat já aceita o sufixo 'Z' do Supabase;
+# nas versões anteriores ele precisa virar '+00:00' antes do parse
+try:
+    datetime.fromisoformat('2000-01-01T00:00:00Z')
+    _ACEITA_Z = True
+except ValueError:
+    _ACEITA_Z = False
+
+@lru_cache(maxsize=4096)
+def _parse_iso(data_str):
+    """Converte timestamp ISO do Supabase em datetime (memoizado: datas se repetem)"""
+    if not _ACEITA_Z and data_str.endswith('Z'):
+        data_str = data_str[:-1] + '+00:00'
+    return datetime.fromisoformat(data_str)
+
+# Relações buscadas por requisição (paginação via cabeçalho Range)
+TAMANHO_PAGINA = 1000
+
+def _buscar_pagina(url, inicio, contar=False):
+    """
+    Busca uma página de `url` a partir de `inicio` e retorna (itens, total).
+    
+    Retorna None em caso de erro.
+    """
+    headers_pagina = {
+        'Range-Unit': 'items',
+        'Range': f"{inicio}-{inicio + TAMANHO_PAGINA - 1}"
+    }
+    if contar:
+        # O total só é pedido na primeira página (Content-Range: 0-999/N)
+        headers_pagina['Prefer'] = 'count=exact'
+    
+    response = session.get(url, headers=headers_pagina)
+    
+    if response.status_code not in (200, 206):
+        print(f"❌ Erro ao buscar relações: {response.status_code}")
+        return None
+    
+    total = response.headers.get('Content-Range', '').rpartition('/')[2]
+    return orjson.loads(response.content), (int(total) if total.isdigit() else 0)
+
 def main():
     """Script para exibir apenas responsáveis com relações de nível 1"""
     try:
@@ -21,132 +106,143 @@ def main():
             return
         
         base_url = f"{url}/rest/v1"
-        headers = {
+        # Credenciais fixadas uma única vez na sessão: nenhuma requisição
+        # precisa repassar (e copiar) o dicionário de cabeçalhos
+        session.headers.update({
             'apikey': key,
             'Authorization': f'Bearer {key}',
             'Content-Type': 'application/json'
-        }
+        })
         
         print("🎯 Buscando apenas relações de NÍVEL 1...")
-        print("=" * 60)
+        print(_BAR60)
         
-        # Buscar relações apenas de nível 1
-        response = requests.get(f"{base_url}/relacao?nivel=eq.1", headers=headers)
-        
-        if response.status_code != 200:
-            print(f"❌ Erro ao buscar relações: {response.status_code}")
-            return
+        # Buscar relações de nível 1 já com responsável e aluno embutidos
+        # (join feito pelo PostgREST via chave estrangeira), página a página:
+        # cada página é agrupada e descartada antes de pedir a próxima
+        url_relacoes = (
+            f"{base_url}/relacao?nivel=eq.1"
+            "&select=created_at,"
+            "responsavel:responsaveis(id,nome,sobrenome,contato,created_at),"
+            "aluno:alunos(id,nome,sobrenome,serie_id,escola_id,foto_url,created_at)"
+            # Ordem única: páginas consecutivas não se sobrepõem nem pulam relações
+            "&order=id.asc"
+        )
         
-        relacoes = response.json()
-        
-        if not relacoes:
-            print("⚠️ Nenhuma relação de nível 1 encontrada")
-            return
-        
-        print(f"✅ {len(relacoes)} relação(ões) de NÍVEL 1 encontrada(s)")
-        print("\n" + "=" * 80)
-        
-        # Agrupar por responsável
         responsaveis_map = {}
+        total_relacoes = 0
+        total_esperado = None
         
-        for relacao in relacoes:
-            responsavel_id = relacao.get('responsavel_id')
-            aluno_id = relacao.get('aluno_id')
+        while True:
+            resultado = _buscar_pagina(url_relacoes, total_relacoes, contar=total_esperado is None)
+            if resultado is None:
+                return
+            
+            pagina, total = resultado
+            if total_esperado is None:
+                total_esperado = total
+            
+            total_relacoes += len(pagina)
             
-            if responsavel_id not in responsaveis_map:
-                # Buscar dados do responsável
-                resp_response = requests.get(
-                    f"{base_url}/responsaveis?id=eq.{responsavel_id}",
-                    headers=headers
-                )
+            # Agrupar por responsável
+            for relacao in pagina:
+                responsavel = relacao.get('responsavel')
+                if not responsavel:
+                    continue
                 
-                if resp_response.status_code == 200 and resp_response.json():
-                    responsaveis_map[responsavel_id] = {
-                        'dados': resp_response.json()[0],
+                # Um único lookup por relação: o grupo do responsável é criado na
+                # primeira vez que o id aparece e reaproveitado nas seguintes
+                grupo = responsaveis_map.get(responsavel['id'])
+                if grupo is None:
+                    grupo = responsaveis_map[responsavel['id']] = {
+                        'dados': responsavel,
                         'alunos': []
                     }
-                else:
-                    continue
-            
-            # Buscar dados do aluno
-            aluno_response = requests.get(
-                f"{base_url}/alunos?id=eq.{aluno_id}",
-                headers=headers
-            )
+                
+                aluno = relacao.get('aluno')
+                if aluno:
+                    aluno['relacao_criada'] = relacao.get('created_at')
+                    grupo['alunos'].append(aluno)
             
-            if aluno_response.status_code == 200 and aluno_response.json():
-                aluno = aluno_response.json()[0]
-                aluno['relacao_criada'] = relacao.get('created_at')
-                responsaveis_map[responsavel_id]['alunos'].append(aluno)
+            # Página curta não indica o fim: o servidor pode limitar as páginas
+            # (max-rows) abaixo de TAMANHO_PAGINA; só o total ou uma página
+            # vazia encerram a busca
+            if not pagina or (total_esperado and total_relacoes >= total_esperado):
+                break
+        
+        if not total_relacoes:
+            print("⚠️ Nenhuma relação de nível 1 encontrada")
+            return
+        
+        print(f"✅ {total_relacoes} relação(ões) de NÍVEL 1 encontrada(s)")
+        print("\n" + _BAR80)
         
         if not responsaveis_map:
             print("⚠️ Nenhum responsável encontrado para as relações de nível 1")
             return
         
-        # Exibir resultados
+        # Exibir resultados (linhas acumuladas e escritas de uma só vez)
         total_alunos = 0
+        saida = []
         
         for i, (resp_id, dados) in enumerate(responsaveis_map.items(), 1):
             responsavel = dados['dados']
             alunos = dados['alunos']
             
-            print(f"\n{i}. 👤 RESPONSÁVEL:")
-            print(f"   📛 Nome: {responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}")
-            print(f"   📞 Contato: {responsavel.get('contato', 'N/A')}")
-            print(f"   🆔 ID: {responsavel.get('id', 'N/A')}")
+            saida.append(_TPL_RESPONSAVEL.format_map(_ComPadrao(responsavel, i=i)))
             
             # Data de criação do responsável
             if responsavel.get('created_at'):
                 try:
-                    data_resp = datetime.fromisoformat(responsavel['created_at'].replace('Z', '+00:00'))
-                    print(f"   📅 Criado: {data_resp.strftime('%d/%m/%Y às %H:%M:%S')}")
-                except:
-                    print(f"   📅 Criado: {responsavel.get('created_at', 'N/A')}")
+                    data_resp = _parse_iso(responsavel['created_at'])
+                    saida.append(f"   📅 Criado: {data_resp.strftime(_FMT_DATA_HORA)}")
+                except ValueError:
+                    saida.append(f"   📅 Criado: {responsavel.get('created_at', 'N/A')}")
             
-            print(f"\n   🎯 ALUNOS DE NÍVEL 1 ({len(alunos)}):")
+            saida.append(f"\n   🎯 ALUNOS DE NÍVEL 1 ({len(alunos)}):")
             
             for j, aluno in enumerate(alunos, 1):
-                print(f"      {j}. 🎓 {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
-                print(f"         🆔 ID: {aluno.get('id', 'N/A')}")
-                print(f"         📚 Série ID: {aluno.get('serie_id', 'N/A')}")
-                print(f"         🏫 Escola ID: {aluno.get('escola_id', 'N/A')}")
+                saida.append(_TPL_ALUNO.format_map(_ComPadrao(aluno, j=j)))
                 
                 # Foto se disponível
                 if aluno.get('foto_url'):
-                    print(f"         📸 Foto: {aluno.get('foto_url', 'N/A')}")
+                    saida.append(f"         📸 Foto: {aluno.get('foto_url', 'N/A')}")
                 
                 # Data da relação
                 if aluno.get('relacao_criada'):
                     try:
-                        data_relacao = datetime.fromisoformat(aluno['relacao_criada'].replace('Z', '+00:00'))
-                        print(f"         🔗 Relação criada: {data_relacao.strftime('%d/%m/%Y às %H:%M:%S')}")
-                    except:
-                        print(f"         🔗 Relação criada: {aluno.get('relacao_criada', 'N/A')}")
+                        data_relacao = _parse_iso(aluno['relacao_criada'])
+                        saida.append(f"         🔗 Relação criada: {data_relacao.strftime(_FMT_DATA_HORA)}")
+                    except ValueError:
+                        saida.append(f"         🔗 Relação criada: {aluno.get('relacao_criada', 'N/A')}")
                 
                 # Data de criação do aluno
                 if aluno.get('created_at'):
                     try:
-                        data_aluno = datetime.fromisoformat(aluno['created_at'].replace('Z', '+00:00'))
-                        print(f"         📅 Aluno criado: {data_aluno.strftime('%d/%m/%Y')}")
-                    except:
-                        print(f"         📅 Aluno criado: {aluno.get('created_at', 'N/A')}")
+                        data_aluno = _parse_iso(aluno['created_at'])
+                        saida.append(f"         📅 Aluno criado: {data_aluno.strftime(_FMT_DATA)}")
+                    except ValueError:
+                        saida.append(f"         📅 Aluno criado: {aluno.get('created_at', 'N/A')}")
                 
                 if j < len(alunos):
-                    print("         " + "- " * 20)
+                    saida.append(_SEP)
             
             total_alunos += len(alunos)
             
             if i < len(responsaveis_map):
-                print("\n" + "=" * 80)
+                saida.append("\n" + _BAR80)
+        
+        sys.stdout.write('\n'.join(saida))
+        sys.stdout.write('\n')
         
         # Resumo final
-        print("\n" + "=" * 80)
+        print("\n" + _BAR80)
         print(f"📊 RESUMO - RELAÇÕES NÍVEL 1:")
         print(f"   🎯 Filtro: Apenas nível 1")
         print(f"   👥 Responsáveis com nível 1: {len(responsaveis_map)}")
         print(f"   🎓 Total de alunos de nível 1: {total_alunos}")
         print(f"   📈 Média de alunos por responsável: {total_alunos/len(responsaveis_map):.1f}")
-        print(f"   🔗 Total de relações de nível 1: {len(relacoes)}")
+        print(f"   🔗 Total de relações de nível 1: {total_relacoes}")
         
         # Informação adicional
         print(f"\n💡 INFORMAÇÃO:")
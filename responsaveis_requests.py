@@ -2,14 +2,37 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
+import cmd
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
 from datetime import datetime
-import json
+from functools import lru_cache
+import orjson
+
+from formatters import formatar_data
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
+# Formato de exibição de data e hora (datas sem hora usam formatters.formatar_data)
+_FMT_DATA_HORA = '%d/%m/%Y às %H:%M:%S'
+
+# Colunas pedidas ao PostgREST: só o que a listagem usa (nada de select=*)
+COLUNAS_RESPONSAVEL = 'id,nome,sobrenome,contato,created_at,updated_at'
+COLUNAS_ALUNO = 'id,nome,sobrenome,serie_id,escola_id,foto_url,created_at'
+COLUNAS_COMPRA = 'id,value,created_at,observacoes,payment_link'
+
+def _formatar_data_hora(data_str):
+    """Formata um timestamp ISO do Supabase com data e hora; None se inválido"""
+    try:
+        return datetime.fromisoformat(data_str.replace('Z', '+00:00')).strftime(_FMT_DATA_HORA)
+    except (ValueError, AttributeError):
+        return None
+
 class SupabaseRequests:
     def __init__(self):
         """Inicializa conexão usando apenas requests"""
@@ -27,56 +50,71 @@ class SupabaseRequests:
             'Prefer': 'return=representation'
         }
         
-        # Cache simples para evitar requisições desnecessárias
-        self._cache = {
-            'responsaveis': None,
-            'relacoes': None,
-            'alunos': None,
-            'cache_time': None
-        }
+        # Sessão compartilhada: reaproveita conexões (keep-alive) entre
+        # requisições em vez de abrir um novo TCP+TLS a cada chamada
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Cache simples para evitar requisições desnecessárias: cada conjunto
+        # de dados tem seu próprio horário e expira de forma independente.
+        # Slots: 'responsaveis' e ('relacoes', filtro_nivel), um por nível
+        self._cache = {}
+        self._cache_time = {}
+        self._cache_etag = {}
         self._cache_timeout = 30  # segundos
     
-    def _is_cache_valid(self):
-        """Verifica se o cache ainda é válido"""
-        if self._cache['cache_time'] is None:
+    def _is_cache_valid(self, slot):
+        """Verifica se o cache de `slot` ainda é válido"""
+        momento = self._cache_time.get(slot)
+        if self._cache.get(slot) is None or momento is None:
             return False
         
-        import time
-        return (time.time() - self._cache['cache_time']) < self._cache_timeout
+        return (time.time() - momento) < self._cache_timeout
     
-    def _update_cache_time(self):
-        """Atualiza o tempo do cache"""
-        import time
-        self._cache['cache_time'] = time.time()
+    def _update_cache(self, slot, dados):
+        """Guarda `dados` no cache de `slot` e reinicia o tempo dele"""
+        self._cache[slot] = dados
+        self._cache_time[slot] = time.time()
+    
+    def _invalidate(self, slot):
+        """Descarta apenas o cache de `slot` (para 'relacoes', o de todos os níveis)"""
+        for chave in [c for c in self._cache if c == slot or (isinstance(c, tuple) and c[0] == slot)]:
+            del self._cache[chave]
+            self._cache_time.pop(chave, None)
+            self._cache_etag.pop(chave, None)
+    
+    @staticmethod
+    def _json(response):
+        """Decodifica o corpo JSON da resposta com orjson (bem mais rápido que o json padrão)"""
+        return orjson.loads(response.content)
     
     def limpar_cache(self):
         """Limpa o cache para forçar nova busca"""
-        self._cache = {
-            'responsaveis': None,
-            'relacoes': None,
-            'alunos': None,
-            'cache_time': None
-        }
+        self._cache.clear()
+        self._cache_time.clear()
+        self._cache_etag.clear()
         print("🧹 Cache limpo!")
     
     def select_all_responsaveis(self, usar_cache=True):
         """Busca todos os responsáveis com cache otimizado"""
         try:
             # Verificar cache primeiro
-            if usar_cache and self._is_cache_valid() and self._cache['responsaveis']:
+            if usar_cache and self._is_cache_valid('responsaveis'):
                 return self._cache['responsaveis']
             
-            response = requests.get(
-                f"{self.base_url}/responsaveis?order=nome.asc",
-                headers=self.headers
-            )
+            response = self.session.get(f"{self.base_url}/responsaveis?select={COLUNAS_RESPONSAVEL}&order=nome.asc")
             
             if response.status_code == 200:
-                responsaveis = response.json()
-                # Atualizar cache
-                self._cache['responsaveis'] = responsaveis
-                if not self._cache['cache_time']:
-                    self._update_cache_time()
+                responsaveis = self._json(response)
+                # Atualizar cache (e o horário dele a cada nova busca)
+                self._update_cache('responsaveis', responsaveis)
                 return responsaveis
             else:
                 print(f"Erro {response.status_code}: {response.text}")
@@ -86,88 +124,71 @@ class SupabaseRequests:
             print(f"Erro na requisição: {e}")
             return None
     
-    def select_responsaveis_com_alunos(self, filtro_nivel=None):
+    def select_responsaveis_com_alunos(self, filtro_nivel=None, usar_cache=True):
         """Busca responsáveis com seus alunos relacionados (OTIMIZADO)"""
         try:
-            import time
             inicio = time.time()
             
             print("⚡ Otimizando busca - carregando dados em lote...")
             
-            # 1. Buscar todos os responsáveis de uma vez
-            responsaveis = self.select_all_responsaveis()
-            if not responsaveis:
-                return None
+            # Resultado já montado para este mesmo filtro: devolvido direto do
+            # cache (cada nível tem sua própria entrada)
+            slot = ('relacoes', filtro_nivel)
+            if usar_cache and self._is_cache_valid(slot):
+                return self._cache[slot]
             
-            # 2. Buscar TODAS as relações de uma vez (muito mais rápido)
-            url_relacoes = f"{self.base_url}/relacao"
+            # 1. Buscar responsáveis, relações e alunos numa única requisição:
+            #    o PostgREST faz o join pelas chaves estrangeiras e devolve cada
+            #    responsável com suas relações e o aluno de cada relação embutidos
+            url = f"{self.base_url}/responsaveis?select={COLUNAS_RESPONSAVEL},relacao(id,nivel,alunos({COLUNAS_ALUNO}))&order=nome.asc"
             if filtro_nivel is not None:
-                url_relacoes += f"?nivel=eq.{filtro_nivel}"
-            
-            relacoes_response = requests.get(url_relacoes, headers=self.headers)
-            
-            if relacoes_response.status_code != 200:
-                print(f"Erro ao buscar relações: {relacoes_response.status_code}")
-                return responsaveis
+                # Filtra só as relações embutidas: responsáveis sem relação
+                # nesse nível continuam na lista, com a lista de alunos vazia
+                url += f"&relacao.nivel=eq.{filtro_nivel}"
             
-            todas_relacoes = relacoes_response.json()
+            # Revalidação condicional: com o ETag da resposta anterior o servidor
+            # pode devolver 304 (sem corpo) e o resultado expirado é reaproveitado
+            etag = self._cache_etag.get(slot) if usar_cache else None
+            response = self.session.get(url, headers={'If-None-Match': etag} if etag else None)
             
-            if not todas_relacoes:
-                # Se não há relações, retornar responsáveis sem alunos
-                for responsavel in responsaveis:
-                    responsavel['alunos'] = []
-                return responsaveis
+            if response.status_code == 304 and self._cache.get(slot) is not None:
+                self._update_cache(slot, self._cache[slot])
+                return self._cache[slot]
             
-            # 3. Extrair todos os IDs de alunos únicos
-            alunos_ids = list(set([relacao['aluno_id'] for relacao in todas_relacoes]))
-            
-            # 4. Buscar TODOS os alunos de uma vez usando query com múltiplos IDs
-            if alunos_ids:
-                # Criar query para buscar múltiplos alunos: id.in.(id1,id2,id3...)
-                ids_string = ','.join(alunos_ids)
-                alunos_response = requests.get(
-                    f"{self.base_url}/alunos?id=in.({ids_string})",
-                    headers=self.headers
-                )
-                
-                if alunos_response.status_code == 200:
-                    todos_alunos = alunos_response.json()
-                    # Criar mapeamento ID -> dados do aluno para acesso rápido
-                    alunos_map = {aluno['id']: aluno for aluno in todos_alunos}
-                else:
-                    print(f"Erro ao buscar alunos: {alunos_response.status_code}")
-                    alunos_map = {}
-            else:
-                alunos_map = {}
+            if response.status_code != 200:
+                print(f"Erro ao buscar responsáveis com relações: {response.status_code}")
+                return None
             
-            # 5. Agrupar relações por responsável
-            relacoes_por_responsavel = {}
-            for relacao in todas_relacoes:
-                resp_id = relacao['responsavel_id']
-                if resp_id not in relacoes_por_responsavel:
-                    relacoes_por_responsavel[resp_id] = []
-                relacoes_por_responsavel[resp_id].append(relacao)
+            responsaveis = self._json(response)
+            if not responsaveis:
+                return None
             
-            # 6. Associar alunos aos responsáveis
+            # 2. Trocar as relações embutidas pela lista de alunos do responsável
+            total_relacoes = 0
+            ids_alunos = set()
             for responsavel in responsaveis:
-                responsavel_id = responsavel['id']
-                responsavel['alunos'] = []
+                relacoes = responsavel.pop('relacao', None) or []
+                total_relacoes += len(relacoes)
                 
-                if responsavel_id in relacoes_por_responsavel:
-                    for relacao in relacoes_por_responsavel[responsavel_id]:
-                        aluno_id = relacao['aluno_id']
-                        
-                        if aluno_id in alunos_map:
-                            aluno = alunos_map[aluno_id].copy()
-                            aluno['nivel_relacao'] = relacao.get('nivel', 'N/A')
-                            aluno['relacao_id'] = relacao.get('id', 'N/A')
-                            responsavel['alunos'].append(aluno)
+                # Cada aluno sai montado num único literal, já com os dados da relação
+                responsavel['alunos'] = [
+                    {**relacao['alunos'], 'nivel_relacao': relacao.get('nivel', 'N/A'), 'relacao_id': relacao.get('id', 'N/A')}
+                    for relacao in relacoes
+                    if relacao.get('alunos')
+                ]
+                ids_alunos.update(aluno['id'] for aluno in responsavel['alunos'])
+            
+            self._update_cache(slot, responsaveis)
+            if response.headers.get('ETag'):
+                self._cache_etag[slot] = response.headers['ETag']
+            else:
+                self._cache_etag.pop(slot, None)
             
             fim = time.time()
             tempo_execucao = fim - inicio
             
             print(f"✅ Busca otimizada concluída em {tempo_execucao:.2f} segundos!")
-            print(f"📊 Estatísticas: {len(responsaveis)} responsáveis, {len(todas_relacoes)} relações, {len(alunos_map)} alunos únicos")
+            print(f"📊 Estatísticas: {len(responsaveis)} responsáveis, {total_relacoes} relações, {len(ids_alunos)} alunos únicos")
             return responsaveis
             
         except Exception as e:
@@ -177,84 +198,77 @@ class SupabaseRequests:
     def select_responsaveis_nivel1_com_dividas(self):
         """Busca responsáveis nível 1 com alunos que têm compras pendentes (status=false)"""
         try:
-            import time
             inicio = time.time()
             
             print("💰 Buscando responsáveis nível 1 com alunos devendo...")
             
-            # 1. Buscar responsáveis nível 1 com seus alunos
-            responsaveis = self.select_responsaveis_com_alunos(filtro_nivel=1)
-            if not responsaveis:
-                return None
-            
-            # 2. Coletar todos os IDs de alunos de nível 1
-            alunos_nivel1_ids = []
-            for responsavel in responsaveis:
-                for aluno in responsavel.get('alunos', []):
-                    alunos_nivel1_ids.append(aluno['id'])
-            
-            if not alunos_nivel1_ids:
-                return []
-            
-            # 3. Buscar TODAS as compras pendentes (status=false) desses alunos
-            ids_string = ','.join(alunos_nivel1_ids)
-            compras_response = requests.get(
-                f"{self.base_url}/compras?aluno_id=in.({ids_string})&status=eq.false",
-                headers=self.headers
+            # 1. Buscar responsáveis nível 1 com seus alunos e as compras
+            #    pendentes (status=false) de cada aluno numa única requisição,
+            #    com as compras já ordenadas da mais recente para a mais antiga.
+            #    Os joins !inner fazem o próprio banco descartar alunos sem
+            #    compra pendente e responsáveis sem nenhum aluno devendo
+            response = self.session.get(
+                f"{self.base_url}/responsaveis?select={COLUNAS_RESPONSAVEL},"
+                f"relacao!inner(id,nivel,alunos!inner({COLUNAS_ALUNO},compras!inner({COLUNAS_COMPRA})))"
+                "&relacao.nivel=eq.1"
+                "&relacao.alunos.compras.status=eq.false"
+                "&relacao.alunos.compras.order=created_at.desc"
+                "&order=nome.asc"
             )
             
-            if compras_response.status_code != 200:
-                print(f"Erro ao buscar compras: {compras_response.status_code}")
-                return []
-            
-            compras_pendentes = compras_response.json()
-            
-            if not compras_pendentes:
-                print("📋 Nenhuma compra pendente encontrada para responsáveis nível 1")
-                return []
+            if response.status_code != 200:
+                print(f"Erro ao buscar responsáveis com compras: {response.status_code}")
+                return None
             
-            # 4. Agrupar compras por aluno_id
-            compras_por_aluno = {}
-            for compra in compras_pendentes:
-                aluno_id = compra['aluno_id']
-                if aluno_id not in compras_por_aluno:
-                    compras_por_aluno[aluno_id] = []
-                compras_por_aluno[aluno_id].append(compra)
+            responsaveis = self._json(response)
+            if not responsaveis:
+                return None
             
-            # 5. Filtrar responsáveis que têm alunos com dívidas
+            # 2. Filtrar responsáveis que têm alunos com dívidas
             responsaveis_com_dividas = []
+            total_compras_pendentes = 0
             
             for responsavel in responsaveis:
                 alunos_com_divida = []
                 
-                for aluno in responsavel.get('alunos', []):
-                    aluno_id = aluno['id']
+                for relacao in responsavel.pop('relacao', None) or []:
+                    aluno = relacao.get('alunos')
+                    if not aluno:
+                        continue
                     
-                    if aluno_id in compras_por_aluno:
+                    compras_aluno = aluno.pop('compras', None)
+                    if compras_aluno:
                         # Calcular total devido por este aluno
-                        compras_aluno = compras_por_aluno[aluno_id]
                         total_devido = sum(float(compra.get('value', 0)) for compra in compras_aluno)
+                        total_compras_pendentes += len(compras_aluno)
                         
-                        # Adicionar informações de dívida ao aluno
-                        aluno_com_divida = aluno.copy()
-                        aluno_com_divida['compras_pendentes'] = compras_aluno
-                        aluno_com_divida['total_devido'] = total_devido
-                        aluno_com_divida['qtd_compras_pendentes'] = len(compras_aluno)
-                        
-                        alunos_com_divida.append(aluno_com_divida)
+                        # Aluno com as informações de dívida, montado num único literal
+                        alunos_com_divida.append({
+                            **aluno,
+                            'nivel_relacao': relacao.get('nivel', 'N/A'),
+                            'relacao_id': relacao.get('id', 'N/A'),
+                            'compras_pendentes': compras_aluno,
+                            'total_devido': total_devido,
+                            'qtd_compras_pendentes': len(compras_aluno)
+                        })
                 
                 # Se este responsável tem alunos com dívidas, incluir na lista
                 if alunos_com_divida:
-                    responsavel_com_divida = responsavel.copy()
-                    responsavel_com_divida['alunos'] = alunos_com_divida
-                    responsavel_com_divida['total_geral_devido'] = sum(aluno['total_devido'] for aluno in alunos_com_divida)
-                    responsaveis_com_dividas.append(responsavel_com_divida)
+                    responsaveis_com_dividas.append({
+                        **responsavel,
+                        'alunos': alunos_com_divida,
+                        'total_geral_devido': sum(aluno['total_devido'] for aluno in alunos_com_divida)
+                    })
+            
+            if not responsaveis_com_dividas:
+                print("📋 Nenhuma compra pendente encontrada para responsáveis nível 1")
+                return []
             
             fim = time.time()
             tempo_execucao = fim - inicio
             
             print(f"✅ Busca de dívidas concluída em {tempo_execucao:.2f} segundos!")
-            print(f"📊 Estatísticas: {len(responsaveis_com_dividas)} responsáveis com dívidas, {len(compras_pendentes)} compras pendentes")
+            print(f"📊 Estatísticas: {len(responsaveis_com_dividas)} responsáveis com dívidas, {total_compras_pendentes} compras pendentes")
             
             return responsaveis_com_dividas
             
@@ -265,14 +279,15 @@ class SupabaseRequests:
     def insert_responsavel(self, data):
         """Insere novo responsável"""
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/responsaveis",
-                headers=self.headers,
                 json=data
             )
             
             if response.status_code in [200, 201]:
-                return response.json()
+                self._invalidate('responsaveis')
+                self._invalidate('relacoes')
+                return self._json(response)
             else:
                 print(f"Erro {response.status_code}: {response.text}")
                 return None
@@ -284,14 +299,15 @@ class SupabaseRequests:
     def update_responsavel(self, id_responsavel, data):
         """Atualiza responsável por ID"""
         try:
-            response = requests.patch(
+            response = self.session.patch(
                 f"{self.base_url}/responsaveis?id=eq.{id_responsavel}",
-                headers=self.headers,
                 json=data
             )
             
             if response.status_code == 200:
-                return response.json()
+                self._invalidate('responsaveis')
+                self._invalidate('relacoes')
+                return self._json(response)
             else:
                 print(f"Erro {response.status_code}: {response.text}")
                 return None
@@ -303,12 +319,11 @@ class SupabaseRequests:
     def delete_responsavel(self, id_responsavel):
         """Deleta responsável por ID"""
         try:
-            response = requests.delete(
-                f"{self.base_url}/responsaveis?id=eq.{id_responsavel}",
-                headers=self.headers
-            )
+            response = self.session.delete(f"{self.base_url}/responsaveis?id=eq.{id_responsavel}")
             
             if response.status_code == 200:
+                self._invalidate('responsaveis')
+                self._invalidate('relacoes')
                 return True
             else:
                 print(f"Erro {response.status_code}: {response.text}")
@@ -318,10 +333,15 @@ class SupabaseRequests:
             print(f"Erro na exclusão: {e}")
             return False
 
-def exibir_responsaveis():
+@lru_cache(maxsize=1)
+def get_supabase():
+    """Instância única de SupabaseRequests por processo (sessão HTTP e cache compartilhados)"""
+    return SupabaseRequests()
+
+def exibir_responsaveis(supabase=None):
     """Exibe todos os responsáveis de forma organizada"""
     try:
-        supabase = SupabaseRequests()
+        supabase = supabase or get_supabase()
         
         print("🔄 Buscando responsáveis...")
         responsaveis = supabase.select_all_responsaveis()
@@ -330,10 +350,12 @@ def exibir_responsaveis():
             print("⚠️ Nenhum responsável encontrado")
             return
         
-        print(f"\n✅ {len(responsaveis)} responsável(is) encontrado(s)")
-        print("=" * 80)
-        print(f"{'ID':<8} | {'NOME':<20} | {'SOBRENOME':<20} | {'CONTATO':<15}")
-        print("-" * 80)
+        # Linhas acumuladas e escritas no stdout de uma só vez
+        saida = []
+        saida.append(f"\n✅ {len(responsaveis)} responsável(is) encontrado(s)")
+        saida.append("=" * 80)
+        saida.append(f"{'ID':<8} | {'NOME':<20} | {'SOBRENOME':<20} | {'CONTATO':<15}")
+        saida.append("-" * 80)
         
         for resp in responsaveis:
             id_short = str(resp.get('id', ''))[:8]
@@ -341,50 +363,43 @@ def exibir_responsaveis():
             sobrenome = (resp.get('sobrenome', 'N/A') or 'N/A')[:18]
             contato = (resp.get('contato', 'N/A') or 'N/A')[:13]
             
-            print(f"{id_short:<8} | {nome:<20} | {sobrenome:<20} | {contato:<15}")
+            saida.append(f"{id_short:<8} | {nome:<20} | {sobrenome:<20} | {contato:<15}")
         
-        print("=" * 80)
+        saida.append("=" * 80)
         
         # Detalhes completos
-        print("\n📄 DETALHES COMPLETOS:")
-        print("-" * 50)
+        saida.append("\n📄 DETALHES COMPLETOS:")
+        saida.append("-" * 50)
         
         for i, resp in enumerate(responsaveis, 1):
-            print(f"\n{i}. RESPONSÁVEL:")
-            print(f"   🆔 ID: {resp.get('id', 'N/A')}")
-            print(f"   👤 Nome: {resp.get('nome', 'N/A')}")
-            print(f"   👤 Sobrenome: {resp.get('sobrenome', 'N/A')}")
-            print(f"   📞 Contato: {resp.get('contato', 'N/A')}")
+            saida.append(f"\n{i}. RESPONSÁVEL:")
+            saida.append(f"   🆔 ID: {resp.get('id', 'N/A')}")
+            saida.append(f"   👤 Nome: {resp.get('nome', 'N/A')}")
+            saida.append(f"   👤 Sobrenome: {resp.get('sobrenome', 'N/A')}")
+            saida.append(f"   📞 Contato: {resp.get('contato', 'N/A')}")
             
             # Formatar datas
             if resp.get('created_at'):
-                try:
-                    data_criacao = datetime.fromisoformat(resp['created_at'].replace('Z', '+00:00'))
-                    print(f"   📅 Criado: {data_criacao.strftime('%d/%m/%Y às %H:%M:%S')}")
-                except:
-                    print(f"   📅 Criado: {resp.get('created_at', 'N/A')}")
+                saida.append(f"   📅 Criado: {_formatar_data_hora(resp['created_at']) or resp['created_at']}")
             
             if resp.get('updated_at'):
-                try:
-                    data_atualizacao = datetime.fromisoformat(resp['updated_at'].replace('Z', '+00:00'))
-                    print(f"   🔄 Atualizado: {data_atualizacao.strftime('%d/%m/%Y às %H:%M:%S')}")
-                except:
-                    print(f"   🔄 Atualizado: {resp.get('updated_at', 'N/A')}")
+                saida.append(f"   🔄 Atualizado: {_formatar_data_hora(resp['updated_at']) or resp['updated_at']}")
             
             if i < len(responsaveis):
-                print("   " + "-" * 40)
+                saida.append("   " + "-" * 40)
         
-        print(f"\n📊 RESUMO:")
-        print(f"   Total: {len(responsaveis)} responsáveis")
-        print(f"   Tabela: responsaveis")
+        saida.append(f"\n📊 RESUMO:")
+        saida.append(f"   Total: {len(responsaveis)} responsáveis")
+        saida.append(f"   Tabela: responsaveis")
+        sys.stdout.write('\n'.join(saida) + '\n')
         
     except Exception as e:
         print(f"❌ Erro: {e}")
 
-def exibir_responsaveis_com_alunos(filtro_nivel=None):
+def exibir_responsaveis_com_alunos(filtro_nivel=None, supabase=None):
     """Exibe responsáveis com seus alunos relacionados"""
     try:
-        supabase = SupabaseRequests()
+        supabase = supabase or get_supabase()
         
         if filtro_nivel is not None:
             print(f"🔄 Buscando responsáveis com relações de NÍVEL {filtro_nivel}...")
@@ -406,88 +421,83 @@ def exibir_responsaveis_com_alunos(filtro_nivel=None):
         
         responsaveis_para_exibir = responsaveis_com_alunos if filtro_nivel is not None else responsaveis
         
+        # Linhas acumuladas e escritas no stdout de uma só vez
+        saida = []
         if filtro_nivel is not None:
-            print(f"\n✅ {len(responsaveis_com_alunos)} responsável(is) com relações de nível {filtro_nivel}")
+            saida.append(f"\n✅ {len(responsaveis_com_alunos)} responsável(is) com relações de nível {filtro_nivel}")
         else:
-            print(f"\n✅ {len(responsaveis)} responsável(is) encontrado(s)")
+            saida.append(f"\n✅ {len(responsaveis)} responsável(is) encontrado(s)")
             
-        print("=" * 100)
+        saida.append("=" * 100)
         
         total_relacoes = 0
         
         for i, resp in enumerate(responsaveis_para_exibir, 1):
-            print(f"\n{i}. 👤 RESPONSÁVEL:")
-            print(f"   🆔 ID: {resp.get('id', 'N/A')}")
-            print(f"   📛 Nome: {resp.get('nome', 'N/A')} {resp.get('sobrenome', 'N/A')}")
-            print(f"   📞 Contato: {resp.get('contato', 'N/A')}")
+            saida.append(f"\n{i}. 👤 RESPONSÁVEL:")
+            saida.append(f"   🆔 ID: {resp.get('id', 'N/A')}")
+            saida.append(f"   📛 Nome: {resp.get('nome', 'N/A')} {resp.get('sobrenome', 'N/A')}")
+            saida.append(f"   📞 Contato: {resp.get('contato', 'N/A')}")
             
             # Formatar data de criação
             if resp.get('created_at'):
-                try:
-                    data_criacao = datetime.fromisoformat(resp['created_at'].replace('Z', '+00:00'))
-                    print(f"   📅 Criado: {data_criacao.strftime('%d/%m/%Y às %H:%M:%S')}")
-                except:
-                    print(f"   📅 Criado: {resp.get('created_at', 'N/A')}")
+                saida.append(f"   📅 Criado: {_formatar_data_hora(resp['created_at']) or resp['created_at']}")
             
             # Exibir alunos relacionados
             alunos = resp.get('alunos', [])
             if alunos:
                 if filtro_nivel is not None:
-                    print(f"\n   👨‍👩‍👧‍👦 ALUNOS COM NÍVEL {filtro_nivel} ({len(alunos)}):")
+                    saida.append(f"\n   👨‍👩‍👧‍👦 ALUNOS COM NÍVEL {filtro_nivel} ({len(alunos)}):")
                 else:
-                    print(f"\n   👨‍👩‍👧‍👦 ALUNOS RELACIONADOS ({len(alunos)}):")
+                    saida.append(f"\n   👨‍👩‍👧‍👦 ALUNOS RELACIONADOS ({len(alunos)}):")
                     
                 for j, aluno in enumerate(alunos, 1):
-                    print(f"      {j}. 🎓 {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
-                    print(f"         🆔 ID: {aluno.get('id', 'N/A')}")
-                    print(f"         📚 Série ID: {aluno.get('serie_id', 'N/A')}")
-                    print(f"         🏫 Escola ID: {aluno.get('escola_id', 'N/A')}")
-                    print(f"         🔗 Nível Relação: {aluno.get('nivel_relacao', 'N/A')}")
+                    saida.append(f"      {j}. 🎓 {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
+                    saida.append(f"         🆔 ID: {aluno.get('id', 'N/A')}")
+                    saida.append(f"         📚 Série ID: {aluno.get('serie_id', 'N/A')}")
+                    saida.append(f"         🏫 Escola ID: {aluno.get('escola_id', 'N/A')}")
+                    saida.append(f"         🔗 Nível Relação: {aluno.get('nivel_relacao', 'N/A')}")
                     
                     # Foto se disponível
                     if aluno.get('foto_url'):
-                        print(f"         📸 Foto: {aluno.get('foto_url', 'N/A')}")
+                        saida.append(f"         📸 Foto: {aluno.get('foto_url', 'N/A')}")
                     
                     # Data de criação do aluno
                     if aluno.get('created_at'):
-                        try:
-                            data_aluno = datetime.fromisoformat(aluno['created_at'].replace('Z', '+00:00'))
-                            print(f"         📅 Criado: {data_aluno.strftime('%d/%m/%Y')}")
-                        except:
-                            print(f"         📅 Criado: {aluno.get('created_at', 'N/A')}")
+                        saida.append(f"         📅 Criado: {formatar_data(aluno['created_at'])}")
                     
                     if j < len(alunos):
-                        print("         " + "- " * 15)
+                        saida.append("         " + "- " * 15)
                 
                 total_relacoes += len(alunos)
             else:
                 if filtro_nivel is None:
-                    print(f"\n   ⚠️ Nenhum aluno relacionado encontrado")
+                    saida.append(f"\n   ⚠️ Nenhum aluno relacionado encontrado")
             
             if i < len(responsaveis_para_exibir):
-                print("\n" + "=" * 100)
+                saida.append("\n" + "=" * 100)
         
-        print(f"\n📊 RESUMO GERAL:")
+        saida.append(f"\n📊 RESUMO GERAL:")
         if filtro_nivel is not None:
-            print(f"   🎯 Filtro aplicado: Nível {filtro_nivel}")
-            print(f"   👥 Responsáveis com nível {filtro_nivel}: {len(responsaveis_com_alunos)}")
+            saida.append(f"   🎯 Filtro aplicado: Nível {filtro_nivel}")
+            saida.append(f"   👥 Responsáveis com nível {filtro_nivel}: {len(responsaveis_com_alunos)}")
         else:
-            print(f"   👥 Total de responsáveis: {len(responsaveis)}")
-        print(f"   🎓 Total de alunos relacionados: {total_relacoes}")
+            saida.append(f"   👥 Total de responsáveis: {len(responsaveis)}")
+        saida.append(f"   🎓 Total de alunos relacionados: {total_relacoes}")
         if len(responsaveis_para_exibir) > 0:
-            print(f"   📈 Média de alunos por responsável: {total_relacoes/len(responsaveis_para_exibir):.1f}")
+            saida.append(f"   📈 Média de alunos por responsável: {total_relacoes/len(responsaveis_para_exibir):.1f}")
+        sys.stdout.write('\n'.join(saida) + '\n')
         
     except Exception as e:
         print(f"❌ Erro: {e}")
 
-def exibir_responsaveis_nivel_1():
+def exibir_responsaveis_nivel_1(supabase=None):
     """Exibe apenas responsáveis com relações de nível 1"""
-    exibir_responsaveis_com_alunos(filtro_nivel=1)
+    exibir_responsaveis_com_alunos(filtro_nivel=1, supabase=supabase)
 
-def exibir_responsaveis_nivel1_com_dividas():
+def exibir_responsaveis_nivel1_com_dividas(supabase=None):
     """Exibe responsáveis nível 1 com alunos que possuem dívidas"""
     try:
-        supabase = SupabaseRequests()
+        supabase = supabase or get_supabase()
         
         print("💰 RESPONSÁVEIS NÍVEL 1 COM ALUNOS DEVENDO")
         print("="*80)
@@ -504,83 +514,82 @@ def exibir_responsaveis_nivel1_com_dividas():
         total_geral_todas_dividas = sum(resp['total_geral_devido'] for resp in responsaveis_com_dividas)
         total_alunos_devendo = sum(len(resp['alunos']) for resp in responsaveis_com_dividas)
         
-        print(f"📊 RESUMO EXECUTIVO:")
-        print(f"   👥 Responsáveis nível 1 com dívidas: {len(responsaveis_com_dividas)}")
-        print(f"   🎓 Alunos devendo: {total_alunos_devendo}")
-        print(f"   💰 Total geral devido: R$ {total_geral_todas_dividas:.2f}")
-        print("="*80)
+        # Linhas acumuladas e escritas no stdout de uma só vez
+        saida = []
+        saida.append(f"📊 RESUMO EXECUTIVO:")
+        saida.append(f"   👥 Responsáveis nível 1 com dívidas: {len(responsaveis_com_dividas)}")
+        saida.append(f"   🎓 Alunos devendo: {total_alunos_devendo}")
+        saida.append(f"   💰 Total geral devido: R$ {total_geral_todas_dividas:.2f}")
+        saida.append("="*80)
         
         for i, responsavel in enumerate(responsaveis_com_dividas, 1):
-            print(f"\n{i}. 👤 RESPONSÁVEL:")
-            print(f"   📛 Nome: {responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}")
-            print(f"   📞 Contato: {responsavel.get('contato', 'N/A')}")
-            print(f"   💰 Total devido: R$ {responsavel['total_geral_devido']:.2f}")
-            print(f"   🎓 Alunos com dívidas: {len(responsavel['alunos'])}")
+            saida.append(f"\n{i}. 👤 RESPONSÁVEL:")
+            saida.append(f"   📛 Nome: {responsavel.get('nome', 'N/A')} {responsavel.get('sobrenome', 'N/A')}")
+            saida.append(f"   📞 Contato: {responsavel.get('contato', 'N/A')}")
+            saida.append(f"   💰 Total devido: R$ {responsavel['total_geral_devido']:.2f}")
+            saida.append(f"   🎓 Alunos com dívidas: {len(responsavel['alunos'])}")
             
             # Formatar data de criação
             if responsavel.get('created_at'):
-                try:
-                    data_criacao = datetime.fromisoformat(responsavel['created_at'].replace('Z', '+00:00'))
-                    print(f"   📅 Cliente desde: {data_criacao.strftime('%d/%m/%Y')}")
-                except:
-                    pass
+                data_criacao = formatar_data(responsavel['created_at'])
+                if data_criacao:
+                    saida.append(f"   📅 Cliente desde: {data_criacao}")
             
-            print(f"\n   🎓 ALUNOS COM DÍVIDAS:")
-            print(f"   {'-'*60}")
+            saida.append(f"\n   🎓 ALUNOS COM DÍVIDAS:")
+            saida.append(f"   {'-'*60}")
             
             for j, aluno in enumerate(responsavel['alunos'], 1):
-                print(f"      {j}. 🎓 {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
-                print(f"         💰 Total devido: R$ {aluno['total_devido']:.2f}")
-                print(f"         📊 Compras pendentes: {aluno['qtd_compras_pendentes']}")
-                print(f"         🆔 ID: {aluno.get('id', 'N/A')}")
+                saida.append(f"      {j}. 🎓 {aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}")
+                saida.append(f"         💰 Total devido: R$ {aluno['total_devido']:.2f}")
+                saida.append(f"         📊 Compras pendentes: {aluno['qtd_compras_pendentes']}")
+                saida.append(f"         🆔 ID: {aluno.get('id', 'N/A')}")
                 
                 # Exibir detalhes das compras pendentes
-                print(f"         📋 COMPRAS PENDENTES:")
+                saida.append(f"         📋 COMPRAS PENDENTES:")
                 for k, compra in enumerate(aluno['compras_pendentes'], 1):
                     valor = float(compra.get('value', 0))
-                    print(f"            {k}. R$ {valor:.2f} - ID: {str(compra.get('id', 'N/A'))[:8]}")
+                    saida.append(f"            {k}. R$ {valor:.2f} - ID: {str(compra.get('id', 'N/A'))[:8]}")
                     
                     # Data da compra
                     if compra.get('created_at'):
-                        try:
-                            data_compra = datetime.fromisoformat(compra['created_at'].replace('Z', '+00:00'))
-                            print(f"               📅 Data: {data_compra.strftime('%d/%m/%Y')}")
-                        except:
-                            pass
+                        data_compra = formatar_data(compra['created_at'])
+                        if data_compra:
+                            saida.append(f"               📅 Data: {data_compra}")
                     
                     # Observações se houver
                     if compra.get('observacoes'):
                         obs = compra['observacoes'][:50] + '...' if len(compra['observacoes']) > 50 else compra['observacoes']
-                        print(f"               📝 Obs: {obs}")
+                        saida.append(f"               📝 Obs: {obs}")
                     
                     # Link de pagamento se houver
                     if compra.get('payment_link'):
-                        print(f"               🔗 Link: {compra['payment_link']}")
+                        saida.append(f"               🔗 Link: {compra['payment_link']}")
                 
                 if j < len(responsavel['alunos']):
-                    print(f"         {'-'*40}")
+                    saida.append(f"         {'-'*40}")
             
             if i < len(responsaveis_com_dividas):
-                print(f"\n{'='*80}")
+                saida.append(f"\n{'='*80}")
         
-        print(f"\n📊 ESTATÍSTICAS DETALHADAS:")
-        print(f"   💰 Maior dívida individual: R$ {max(resp['total_geral_devido'] for resp in responsaveis_com_dividas):.2f}")
-        print(f"   💰 Menor dívida individual: R$ {min(resp['total_geral_devido'] for resp in responsaveis_com_dividas):.2f}")
-        print(f"   💰 Média por responsável: R$ {total_geral_todas_dividas/len(responsaveis_com_dividas):.2f}")
+        saida.append(f"\n📊 ESTATÍSTICAS DETALHADAS:")
+        saida.append(f"   💰 Maior dívida individual: R$ {max(resp['total_geral_devido'] for resp in responsaveis_com_dividas):.2f}")
+        saida.append(f"   💰 Menor dívida individual: R$ {min(resp['total_geral_devido'] for resp in responsaveis_com_dividas):.2f}")
+        saida.append(f"   💰 Média por responsável: R$ {total_geral_todas_dividas/len(responsaveis_com_dividas):.2f}")
         
         # Top 3 maiores devedores
-        print(f"\n🏆 TOP 3 MAIORES DEVEDORES:")
+        saida.append(f"\n🏆 TOP 3 MAIORES DEVEDORES:")
         for i, resp in enumerate(responsaveis_com_dividas[:3], 1):
             nome = f"{resp.get('nome', 'N/A')} {resp.get('sobrenome', 'N/A')}"
-            print(f"   {i}. {nome} - R$ {resp['total_geral_devido']:.2f}")
+            saida.append(f"   {i}. {nome} - R$ {resp['total_geral_devido']:.2f}")
+        sys.stdout.write('\n'.join(saida) + '\n')
         
     except Exception as e:
         print(f"❌ Erro: {e}")
 
-def listar_relacoes_simples():
+def listar_relacoes_simples(supabase=None):
     """Lista apenas as relações de forma simples"""
     try:
-        supabase = SupabaseRequests()
+        supabase = supabase or get_supabase()
         
         print("🔄 Buscando relações...")
         responsaveis = supabase.select_responsaveis_com_alunos()
@@ -589,8 +598,10 @@ def listar_relacoes_simples():
             print("⚠️ Nenhum responsável encontrado")
             return
         
-        print(f"\n📋 RELAÇÕES RESPONSÁVEIS ↔ ALUNOS:")
-        print("-" * 60)
+        # Linhas acumuladas e escritas no stdout de uma só vez
+        saida = []
+        saida.append(f"\n📋 RELAÇÕES RESPONSÁVEIS ↔ ALUNOS:")
+        saida.append("-" * 60)
         
         for resp in responsaveis:
             nome_resp = f"{resp.get('nome', 'N/A')} {resp.get('sobrenome', 'N/A')}"
@@ -600,19 +611,20 @@ def listar_relacoes_simples():
                 for aluno in alunos:
                     nome_aluno = f"{aluno.get('nome', 'N/A')} {aluno.get('sobrenome', 'N/A')}"
                     nivel = aluno.get('nivel_relacao', 'N/A')
-                    print(f"👤 {nome_resp:<30} → 🎓 {nome_aluno:<30} (Nível: {nivel})")
+                    saida.append(f"👤 {nome_resp:<30} → 🎓 {nome_aluno:<30} (Nível: {nivel})")
             else:
-                print(f"👤 {nome_resp:<30} → ⚠️ Sem alunos relacionados")
+                saida.append(f"👤 {nome_resp:<30} → ⚠️ Sem alunos relacionados")
         
-        print("-" * 60)
+        saida.append("-" * 60)
+        sys.stdout.write('\n'.join(saida) + '\n')
         
     except Exception as e:
         print(f"❌ Erro: {e}")
 
-def inserir_responsavel():
+def inserir_responsavel(supabase=None):
     """Insere novo responsável"""
     try:
-        supabase = SupabaseRequests()
+        supabase = supabase or get_supabase()
         
         print("📝 INSERIR NOVO RESPONSÁVEL")
         print("-" * 30)
@@ -646,101 +658,137 @@ def inserir_responsavel():
     except Exception as e:
         print(f"❌ Erro: {e}")
 
-def menu_principal():
-    """Menu principal do sistema"""
-    print("\n🏢 SISTEMA DE RESPONSÁVEIS E ALUNOS (OTIMIZADO)")
-    print("=" * 65)
-    print("1. Listar responsáveis (simples)")
-    print("2. Listar responsáveis com alunos (completo)")
-    print("3. Listar apenas relações NÍVEL 1 🎯")
-    print("4. Listar relações (resumido)")
-    print("5. 💰 Responsáveis nível 1 com DÍVIDAS")
-    print("6. Inserir novo responsável")
-    print("7. Exibir em formato JSON")
-    print("8. 🧹 Limpar cache (forçar nova busca)")
-    print("9. Sair")
-    print("-" * 65)
+class Menu(cmd.Cmd):
+    """
+    Menu interativo sobre cmd.Cmd: o readline cuida da entrada (histórico com
+    as setas) e a mesma instância de SupabaseRequests atende todos os comandos
+    """
+    
+    intro = (
+        "\n🏢 SISTEMA DE RESPONSÁVEIS E ALUNOS (OTIMIZADO)\n"
+        + "=" * 65 + "\n"
+        "1. Listar responsáveis (simples)\n"
+        "2. Listar responsáveis com alunos (completo)\n"
+        "3. Listar apenas relações NÍVEL 1 🎯\n"
+        "4. Listar relações (resumido)\n"
+        "5. 💰 Responsáveis nível 1 com DÍVIDAS\n"
+        "6. Inserir novo responsável\n"
+        "7. Exibir em formato JSON\n"
+        "8. 🧹 Limpar cache (forçar nova busca)\n"
+        "9. Sair\n"
+        + "-" * 65
+    )
+    prompt = "\n👉 Escolha uma opção (1-9): "
+    
+    def __init__(self, supabase):
+        super().__init__()
+        self.supabase = supabase
     
-    while True:
+    def onecmd(self, line):
+        # Um erro num comando não derruba o menu
         try:
-            opcao = input("\n👉 Escolha uma opção (1-9): ").strip()
-            supabase = SupabaseRequests()
-            
-            if opcao == '1':
-                print("\n" + "="*80)
-                exibir_responsaveis()
-                print("="*80)
-                
-            elif opcao == '2':
-                print("\n" + "="*100)
-                exibir_responsaveis_com_alunos()
-                print("="*100)
-                
-            elif opcao == '3':
-                print("\n" + "="*100)
-                exibir_responsaveis_nivel_1()
-                print("="*100)
-                
-            elif opcao == '4':
-                print("\n" + "="*80)
-                listar_relacoes_simples()
-                print("="*80)
-                
-            elif opcao == '5':
-                print("\n" + "="*100)
-                exibir_responsaveis_nivel1_com_dividas()
-                print("="*100)
-                
-            elif opcao == '6':
-                print("\n" + "="*60)
-                inserir_responsavel()
-                print("="*60)
-                # Limpar cache após inserção para mostrar dados atualizados
-                supabase.limpar_cache()
-                
-            elif opcao == '7':
-                print("\n" + "="*60)
-                try:
-                    dados = supabase.select_responsaveis_com_alunos()
-                    if dados:
-                        print("📄 DADOS EM FORMATO JSON:")
-                        print(json.dumps(dados, indent=2, ensure_ascii=False, default=str))
-                    else:
-                        print("⚠️ Nenhum dado encontrado")
-                except Exception as e:
-                    print(f"❌ Erro: {e}")
-                print("="*60)
-                
-            elif opcao == '8':
-                print("\n" + "="*40)
-                supabase.limpar_cache()
-                print("✅ Cache limpo! Próximas buscas serão atualizadas.")
-                print("="*40)
-                
-            elif opcao == '9':
-                print("👋 Saindo... Até mais!")
-                break
-                
-            else:
-                print("❌ Opção inválida. Escolha entre 1-9.")
-                
-            print("\n" + "-"*75)
-            print("1. Simples | 2. Completo | 3. Nível 1 | 4. Relações | 5. Dívidas | 6. Inserir | 7. JSON | 8. Cache | 9. Sair")
-            
-        except KeyboardInterrupt:
-            print("\n\n👋 Saindo... Até mais!")
-            break
+            return super().onecmd(line)
         except Exception as e:
             print(f"❌ Erro: {e}")
+    
+    def postcmd(self, stop, line):
+        if not stop:
+            print("\n" + "-"*75)
+            print("1. Simples | 2. Completo | 3. Nível 1 | 4. Relações | 5. Dívidas | 6. Inserir | 7. JSON | 8. Cache | 9. Sair")
+        return stop
+    
+    def emptyline(self):
+        # Por padrão o cmd repetiria o último comando
+        self.default('')
+    
+    def default(self, line):
+        print("❌ Opção inválida. Escolha entre 1-9.")
+    
+    def do_1(self, arg):
+        """Listar responsáveis (simples)"""
+        print("\n" + "="*80)
+        exibir_responsaveis(supabase=self.supabase)
+        print("="*80)
+    
+    def do_2(self, arg):
+        """Listar responsáveis com alunos (completo)"""
+        print("\n" + "="*100)
+        exibir_responsaveis_com_alunos(supabase=self.supabase)
+        print("="*100)
+    
+    def do_3(self, arg):
+        """Listar apenas relações NÍVEL 1"""
+        print("\n" + "="*100)
+        exibir_responsaveis_nivel_1(supabase=self.supabase)
+        print("="*100)
+    
+    def do_4(self, arg):
+        """Listar relações (resumido)"""
+        print("\n" + "="*80)
+        listar_relacoes_simples(supabase=self.supabase)
+        print("="*80)
+    
+    def do_5(self, arg):
+        """Responsáveis nível 1 com dívidas"""
+        print("\n" + "="*100)
+        exibir_responsaveis_nivel1_com_dividas(supabase=self.supabase)
+        print("="*100)
+    
+    def do_6(self, arg):
+        """Inserir novo responsável"""
+        print("\n" + "="*60)
+        inserir_responsavel(supabase=self.supabase)
+        print("="*60)
+        # Limpar cache após inserção para mostrar dados atualizados
+        self.supabase.limpar_cache()
+    
+    def do_7(self, arg):
+        """Exibir em formato JSON"""
+        print("\n" + "="*60)
+        dados = self.supabase.select_responsaveis_com_alunos()
+        if dados:
+            print("📄 DADOS EM FORMATO JSON:")
+            # Bytes do orjson direto no buffer do stdout, sem decodificar
+            sys.stdout.flush()
+            sys.stdout.buffer.write(orjson.dumps(dados, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str) + b'\n')
+        else:
+            print("⚠️ Nenhum dado encontrado")
+        print("="*60)
+    
+    def do_8(self, arg):
+        """Limpar cache (forçar nova busca)"""
+        print("\n" + "="*40)
+        self.supabase.limpar_cache()
+        print("✅ Cache limpo! Próximas buscas serão atualizadas.")
+        print("="*40)
+    
+    def do_9(self, arg):
+        """Sair"""
+        print("👋 Saindo... Até mais!")
+        return True
+    
+    # Ctrl+D encerra como a opção 9
+    def do_EOF(self, arg):
+        print()
+        return self.do_9(arg)
+
+def menu_principal(supabase=None):
+    """Menu principal do sistema"""
+    # Uma única instância para o menu todo: o cache e as conexões da sessão
+    # sobrevivem de uma opção para a outra
+    try:
+        Menu(supabase or get_supabase()).cmdloop()
+    except KeyboardInterrupt:
+        print("\n\n👋 Saindo... Até mais!")
 
 if __name__ == "__main__":
     try:
         # Teste rápido de conexão
-        supabase = SupabaseRequests()
+        supabase = get_supabase()
         print("✅ Conexão com Supabase estabelecida")
         
         # Iniciar menu
-        menu_principal()
+        menu_principal(supabase)
         
     except Exception as e:
         print(f"❌ Erro ao inicializar: {e}")
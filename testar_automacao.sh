@@ -1,3 +1,3 @@
 #!/bin/bash
-python3 teste_automatizacao.py
+python3 teste_automatizacao.py --interactive
 read -p 'Pressione Enter para continuar...'
\ No newline at end of file
@@ -4,16 +4,21 @@
 import os
 from dotenv import load_dotenv
 
-# Carregar variáveis de ambiente
-load_dotenv()
+# Carregar variáveis de ambiente (lidas uma única vez, na importação); se já
+# vierem todas do ambiente (CI, container), o .env nem é lido
+if not (os.getenv('SUPABASE_URL') and os.getenv('SUPABASE_KEY')):
+    load_dotenv()
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_KEY')
 
 def teste_simples():
     """Teste básico de conexão sem usar a classe"""
     try:
         print("🔄 Carregando variáveis de ambiente...")
         
-        url = os.getenv('SUPABASE_URL')
-        key = os.getenv('SUPABASE_KEY')
+        url = SUPABASE_URL
+        key = SUPABASE_KEY
         
         if not url or not key:
             print("❌ Erro: Variáveis SUPABASE_URL ou SUPABASE_KEY não encontradas no .env")
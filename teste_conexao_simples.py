@@ -2,56 +2,75 @@
 # -*- coding: utf-8 -*-
 
 import os
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-import json
+import orjson
 
-# Carregar variáveis de ambiente
-load_dotenv()
+# Carregar variáveis de ambiente (lidas uma única vez, na importação); se já
+# vierem todas do ambiente (CI, container), o .env nem é lido
+if not (os.getenv('SUPABASE_URL') and os.getenv('SUPABASE_KEY')):
+    load_dotenv()
+
+SUPABASE_URL = os.getenv('SUPABASE_URL')
+SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+API_URL = f"{SUPABASE_URL}/rest/v1/responsaveis"
+HEADERS = {
+    'apikey': SUPABASE_KEY,
+    'Authorization': f'Bearer {SUPABASE_KEY}',
+    'Content-Type': 'application/json'
+}
+
+# Sessão HTTP compartilhada: o teste e a listagem reaproveitam a mesma
+# conexão (keep-alive) em vez de refazer o handshake TCP+TLS
+session = requests.Session()
+adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=10,
+    max_retries=Retry(total=2, backoff_factor=0.2)
+)
+session.mount('https://', adapter)
+session.mount('http://', adapter)
+session.headers.update(HEADERS)
 
 def teste_com_requests():
     """Testa conexão usando apenas requests (sem biblioteca supabase)"""
     try:
         print("🔄 Carregando credenciais...")
         
-        url = os.getenv('SUPABASE_URL')
-        key = os.getenv('SUPABASE_KEY')
-        
-        if not url or not key:
+        if not SUPABASE_URL or not SUPABASE_KEY:
             print("❌ Credenciais não encontradas no .env")
             return False
             
-        print(f"✅ URL: {url[:30]}...")
-        print(f"✅ Key: {key[:20]}...")
+        print(f"✅ URL: {SUPABASE_URL[:30]}...")
+        print(f"✅ Key: {SUPABASE_KEY[:20]}...")
         
         # Fazer requisição HTTP direta
-        api_url = f"{url}/rest/v1/responsaveis"
-        
-        headers = {
-            'apikey': key,
-            'Authorization': f'Bearer {key}',
-            'Content-Type': 'application/json',
-            'Prefer': 'return=representation'
-        }
-        
         print("\n🔄 Fazendo requisição HTTP direta...")
-        response = requests.get(api_url, headers=headers, params={'limit': 5})
+        response = session.get(API_URL, params={'limit': 5})
         
         print(f"📊 Status Code: {response.status_code}")
         
         if response.status_code == 200:
             print("✅ Conexão HTTP realizada com sucesso!")
             
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"📋 Registros encontrados: {len(data)}")
             
             if data:
                 print("\n🔍 Primeiros registros:")
+                saida = []
                 for i, item in enumerate(data[:3], 1):
-                    print(f"  {i}. Nome: {item.get('nome', 'N/A')} {item.get('sobrenome', 'N/A')}")
-                    print(f"     Contato: {item.get('contato', 'N/A')}")
-                    print(f"     ID: {item.get('id', 'N/A')[:8]}...")
-                    print()
+                    # `or` também cobre id None, que quebraria o fatiamento
+                    ident = item.get('id') or 'N/A'
+                    saida.append(
+                        f"  {i}. Nome: {item.get('nome', 'N/A')} {item.get('sobrenome', 'N/A')}\n"
+                        f"     Contato: {item.get('contato', 'N/A')}\n"
+                        f"     ID: {ident[:8]}...\n"
+                    )
+                sys.stdout.write('\n'.join(saida) + '\n')
             else:
                 print("⚠️ Tabela vazia")
                 
@@ -84,49 +103,74 @@ def teste_com_requests():
         print(f"❌ Erro inesperado: {e}")
         return False
 
+def iter_responsaveis(page_size=50):
+    """
+    Percorre os responsáveis página a página (cabeçalho Range do PostgREST).
+    
+    A próxima página só é buscada quando o chamador consome a anterior; o
+    total vem do Content-Range da primeira página (Prefer: count=exact) e
+    encerra a paginação.
+    """
+    inicio = 0
+    total = None
+    
+    while True:
+        headers_pagina = {
+            'Range-Unit': 'items',
+            'Range': f'{inicio}-{inicio + page_size - 1}'
+        }
+        if total is None:
+            # O COUNT(*) só é feito uma vez, na primeira página
+            headers_pagina['Prefer'] = 'count=exact'
+        
+        # Ordem única: páginas consecutivas não se sobrepõem nem pulam linhas
+        response = session.get(API_URL, params={'order': 'id.asc'}, headers=headers_pagina)
+        
+        # 206 = página parcial; 416 = início além do fim da tabela
+        if response.status_code == 416:
+            return
+        if response.status_code not in (200, 206):
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+        
+        pagina = orjson.loads(response.content)
+        yield from pagina
+        
+        if total is None:
+            # Content-Range: "0-49/1234" (ou "*/0" para tabela vazia)
+            total = response.headers.get('Content-Range', '*/*').rpartition('/')[2]
+            total = int(total) if total.isdigit() else 0
+        
+        inicio += len(pagina)
+        if not pagina or (total and inicio >= total):
+            return
+
 def listar_responsaveis():
     """Lista todos os responsáveis usando requests"""
     try:
-        url = os.getenv('SUPABASE_URL')
-        key = os.getenv('SUPABASE_KEY')
-        
-        if not url or not key:
+        if not SUPABASE_URL or not SUPABASE_KEY:
             print("❌ Credenciais não encontradas")
             return
-            
-        api_url = f"{url}/rest/v1/responsaveis"
         
-        headers = {
-            'apikey': key,
-            'Authorization': f'Bearer {key}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.get(api_url, headers=headers)
-        
-        if response.status_code == 200:
-            data = response.json()
+        i = 0
+        for i, resp in enumerate(iter_responsaveis(), 1):
+            if i == 1:
+                print("✅ Responsáveis encontrados:")
+                print("=" * 60)
             
-            if not data:
-                print("⚠️ Nenhum responsável encontrado")
-                return
-                
-            print(f"✅ {len(data)} responsáveis encontrados:")
-            print("=" * 60)
+            print(f"{i:2d}. {resp.get('nome', 'N/A')} {resp.get('sobrenome', 'N/A')}")
+            print(f"    📞 Contato: {resp.get('contato', 'N/A')}")
+            print(f"    🆔 ID: {resp.get('id', 'N/A')}")
             
-            for i, resp in enumerate(data, 1):
-                print(f"{i:2d}. {resp.get('nome', 'N/A')} {resp.get('sobrenome', 'N/A')}")
-                print(f"    📞 Contato: {resp.get('contato', 'N/A')}")
-                print(f"    🆔 ID: {resp.get('id', 'N/A')}")
-                
-                # Datas
-                if resp.get('created_at'):
-                    print(f"    📅 Criado: {resp['created_at'][:10]}")
-                    
-                print("-" * 40)
+            # Datas
+            if resp.get('created_at'):
+                print(f"    📅 Criado: {resp['created_at'][:10]}")
                 
+            print("-" * 40)
+        
+        if i:
+            print(f"📊 Total: {i} responsáveis")
         else:
-            print(f"❌ Erro {response.status_code}: {response.text}")
+            print("⚠️ Nenhum responsável encontrado")
             
     except Exception as e:
         print(f"❌ Erro: {e}")
@@ -5,13 +5,31 @@ Teste rápido de performance das otimizações
 
 import os
 import time
+import statistics
 from dotenv import load_dotenv
 
 # Carregar variáveis de ambiente
 load_dotenv()
 
 # Importar nossa classe otimizada
-from responsaveis_requests import SupabaseRequests
+from responsaveis_requests import get_supabase
+
+# Quantas vezes cada fase é executada (o relatório usa mínimo e mediana)
+REPETICOES = 5
+
+def _medir(func, repeticoes=REPETICOES):
+    """Executa `func` várias vezes e retorna (último resultado, tempos em segundos)"""
+    tempos = []
+    resultado = None
+    
+    for _ in range(repeticoes):
+        # perf_counter_ns: relógio monotônico de alta resolução (time.time
+        # pode pular com ajustes do NTP)
+        inicio = time.perf_counter_ns()
+        resultado = func()
+        tempos.append((time.perf_counter_ns() - inicio) / 1e9)
+    
+    return resultado, tempos
 
 def teste_performance():
     """Testa a performance da busca otimizada"""
@@ -20,38 +38,37 @@ def teste_performance():
     
     try:
         # Criar conexão
-        supabase = SupabaseRequests()
+        supabase = get_supabase()
+        
+        # Aquecimento: abre a conexão (handshake TCP+TLS) fora da medição
+        print("0. Aquecimento (não medido):")
+        supabase.select_responsaveis_com_alunos(usar_cache=False)
         
-        print("1. Primeira execução (sem cache):")
-        inicio = time.time()
+        print(f"\n1. Execuções sem cache ({REPETICOES}x):")
         
         # Buscar dados
-        responsaveis = supabase.select_responsaveis_com_alunos()
+        responsaveis, tempos1 = _medir(lambda: supabase.select_responsaveis_com_alunos(usar_cache=False))
         
         if responsaveis:
-            fim = time.time()
-            tempo1 = fim - inicio
+            tempo1 = statistics.median(tempos1)
             
             total_alunos = sum(len(r.get('alunos', [])) for r in responsaveis)
-            print(f"   ✅ {len(responsaveis)} responsáveis, {total_alunos} alunos em {tempo1:.2f}s")
+            print(f"   ✅ {len(responsaveis)} responsáveis, {total_alunos} alunos em {tempo1:.4f}s (mediana)")
             
-            print("\n2. Segunda execução (com cache):")
-            inicio = time.time()
+            print(f"\n2. Execuções com cache ({REPETICOES}x):")
             
             # Buscar novamente (deveria usar cache)
-            responsaveis2 = supabase.select_responsaveis_com_alunos()
-            
-            fim = time.time()
-            tempo2 = fim - inicio
+            responsaveis2, tempos2 = _medir(lambda: supabase.select_responsaveis_com_alunos())
+            tempo2 = statistics.median(tempos2)
             
             if responsaveis2:
-                print(f"   ✅ Cache funcionando! Tempo: {tempo2:.2f}s")
+                print(f"   ✅ Cache funcionando! Tempo: {tempo2:.6f}s (mediana)")
                 
                 # Calcular melhoria
-                melhoria = ((tempo1 - tempo2) / tempo1) * 100
+                melhoria = ((tempo1 - tempo2) / tempo1) * 100 if tempo1 else 0.0
                 print(f"\n📊 RESULTADO:")
-                print(f"   🕐 Primeira busca: {tempo1:.2f}s")
-                print(f"   ⚡ Segunda busca:  {tempo2:.2f}s")
+                print(f"   🕐 Sem cache: mín {min(tempos1):.4f}s | mediana {tempo1:.4f}s")
+                print(f"   ⚡ Com cache: mín {min(tempos2):.6f}s | mediana {tempo2:.6f}s")
                 print(f"   📈 Melhoria: {melhoria:.1f}% mais rápido!")
                 
                 if tempo1 > 2: